@@ -167,10 +167,34 @@ AUTH_USER_MODEL = 'users.User'
 CELERY_BROKER_URL = f'redis://{os.getenv("REDIS_HOST", "redis")}:{os.getenv("REDIS_PORT", 6379)}/0'
 CELERY_TIMEZONE = 'Asia/Tashkent'
 CELERY_RESULT_BACKEND = f'redis://{os.getenv("REDIS_HOST", "redis")}:{os.getenv("REDIS_PORT", 6379)}/0'
+# Batches of broadcasts run their own event loop and need a prefork or solo worker,
+# other tasks are consumed by the gevent worker
+CELERY_TASK_ROUTES = {'broadcast.tasks.send_message': {'queue': 'broadcast'}}
 
 # REDIS
 REDIS_CUSTOM_DATA = 4
 
+# Broadcast
+# Can be pointed to a local fake server to measure broadcast throughput
+TELEGRAM_API_URL = env('TELEGRAM_API_URL', default='https://api.telegram.org')
+# https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+BROADCAST_GLOBAL_RATE = env('BROADCAST_GLOBAL_RATE', cast=float, default=30)
+BROADCAST_CHAT_RATE = env('BROADCAST_CHAT_RATE', cast=float, default=1)
+# Recipients sent by one celery task and messages in flight inside of it
+BROADCAST_BATCH_SIZE = env('BROADCAST_BATCH_SIZE', cast=int, default=200)
+BROADCAST_CONCURRENCY = env('BROADCAST_CONCURRENCY', cast=int, default=30)
+BROADCAST_TIMEOUT = env('BROADCAST_TIMEOUT', cast=int, default=60)
+# Chat where media is uploaded before broadcasting to get its file_id
+BROADCAST_SERVICE_CHAT = env('CHAT_ID', default=None)
+# Seconds live counters of a broadcast are kept in redis
+BROADCAST_PROGRESS_TTL = env('BROADCAST_PROGRESS_TTL', cast=int, default=7 * 24 * 60 * 60)
+BROADCAST_PROGRESS_REFRESH = env('BROADCAST_PROGRESS_REFRESH', cast=int, default=5)
+
+# Reports
+# Rows fetched from db at once and rows used to estimate widths of columns
+REPORT_CHUNK_SIZE = env('REPORT_CHUNK_SIZE', cast=int, default=2000)
+REPORT_WIDTH_SAMPLE = env('REPORT_WIDTH_SAMPLE', cast=int, default=1000)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
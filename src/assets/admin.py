@@ -1,6 +1,7 @@
 import os
 
 from django.contrib import admin
+from django.db.models import Count
 
 from assets import models
 
@@ -16,9 +17,13 @@ class AssetAdmin(admin.ModelAdmin):
     def link(self, instance):
         return f'https://t.me/{os.getenv("BOT_NAME")}?start=asset_{instance.id}'
 
+    def get_queryset(self, request):
+        qs = super(AssetAdmin, self).get_queryset(request)
+        return qs.annotate(contacts_count=Count('contactasset'))
+
     @admin.display(description='Подсчет')
     def count(self, isntance):
-        return isntance.contactasset_set.count()
+        return isntance.contacts_count
 
     @admin.display(description='Команда вызова')
     def command(self, instance):
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from assets.models import Asset
+from general.utils.cache import invalidate_media
+
+
+@receiver(post_save, sender=Asset)
+def asset_invalidate_media(sender, instance, **kwargs):
+    """
+    Make bot upload media again if it was replaced
+    """
+    invalidate_media(instance.file)
@@ -23,3 +23,35 @@ DATABASES = {
     'FSM': 2,
     'CUSTOM_DATA': 4
 }
+
+# Locale of a contact is cached in memory of the process for LOCALE_CACHE_TTL seconds
+# and in redis for LOCALE_CACHE_REDIS_TTL seconds. Set LOCALE_CACHE_REDIS_TTL to 0 to disable redis tier
+LOCALE_CACHE_SIZE = int(os.environ.get('LOCALE_CACHE_SIZE', 10000))
+LOCALE_CACHE_TTL = int(os.environ.get('LOCALE_CACHE_TTL', 300))
+LOCALE_CACHE_REDIS_TTL = int(os.environ.get('LOCALE_CACHE_REDIS_TTL', 86400))
+
+# Serialized keyboards of menus and quiz questions
+KEYBOARD_CACHE_SIZE = int(os.environ.get('KEYBOARD_CACHE_SIZE', 5000))
+KEYBOARD_CACHE_TTL = int(os.environ.get('KEYBOARD_CACHE_TTL', 3600))
+
+# Access level (contact, lead or client) of contacts used to pick their main keyboard
+ACCESS_LEVEL_CACHE_SIZE = int(os.environ.get('ACCESS_LEVEL_CACHE_SIZE', 10000))
+ACCESS_LEVEL_CACHE_TTL = int(os.environ.get('ACCESS_LEVEL_CACHE_TTL', 60))
+
+# Raise instead of logging when a handler executes more queries than its budget
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', 'false').lower() == 'true'
+
+# Updates processed at once. Updates of one chat are always processed one after another
+BOT_CONCURRENCY = int(os.environ.get('BOT_CONCURRENCY', 100))
+# Connections of a bot process. Every update being processed may hold one,
+# overflow leaves room for catalog loaders using their own sessions
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', min(BOT_CONCURRENCY, 20)))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', BOT_CONCURRENCY))
+
+# Seconds answers of a quiz are kept after the last answer
+QUIZ_STATE_TTL = int(os.environ.get('QUIZ_STATE_TTL', 7 * 24 * 60 * 60))
+
+# Answers of a quiz in progress are saved to db every QUIZ_CHECKPOINT_ANSWERS questions
+# or QUIZ_CHECKPOINT_SECONDS seconds, whichever comes first, and when the quiz is finished
+QUIZ_CHECKPOINT_ANSWERS = int(os.environ.get('QUIZ_CHECKPOINT_ANSWERS', 5))
+QUIZ_CHECKPOINT_SECONDS = int(os.environ.get('QUIZ_CHECKPOINT_SECONDS', 60))
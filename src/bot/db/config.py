@@ -5,7 +5,12 @@ from sqlalchemy.orm import sessionmaker
 
 from bot import config
 
-engine = create_async_engine(config.DB_URL, pool_pre_ping=True)
+engine = create_async_engine(
+    config.DB_URL,
+    pool_pre_ping=True,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+)
 SessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 Base = declarative_base()
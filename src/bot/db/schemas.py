@@ -324,6 +324,15 @@ class ContactFormTable(BaseModel):
     data = Column(sqlalchemy_json.mutable_json_type(dbtype=JSONB, nested=True), nullable=True, default=dict)
 
 
+class FormAnswerTallyTable(BaseModel):
+    __tablename__ = 'forms_formanswertally'
+
+    form_id = Column(Integer, ForeignKey('forms_form.id', ondelete='CASCADE'), nullable=False)
+    question_id = Column(Integer, ForeignKey('forms_formquestion.id', ondelete='CASCADE'), nullable=False)
+    answer_id = Column(Integer, ForeignKey('forms_formanswer.id', ondelete='CASCADE'), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+
 class AssetTable(BaseModel):
     __tablename__ = 'assets_asset'
 
@@ -355,6 +364,9 @@ class Message(BaseModel):
     delivery_start_time = Column(DateTime, nullable=False)
     delivery_end_time = Column(DateTime, nullable=True)
     notes = Column(TEXT, nullable=True)
+    video_duration = Column(Integer, nullable=True)
+    video_width = Column(Integer, nullable=True)
+    video_height = Column(Integer, nullable=True)
 
 
 class MessageHistory(BaseModel):
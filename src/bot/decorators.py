@@ -1,14 +1,18 @@
 import functools
 
 from bot.db.config import SessionLocal
+from bot.middlewares.session import current_session
 
 
 def create_session(func):
     """
     Create session for database access.
+    Session of the update being processed is reused if there is one.
     """
     @functools.wraps(func)
     async def inner(*args, **kwargs):
+        if not kwargs.get('session'):
+            kwargs['session'] = current_session.get()
         if not kwargs.get('session'):
             async with SessionLocal() as session:
                 kwargs['session'] = session
@@ -17,8 +17,10 @@ from bot.decorators import create_session
 from bot.misc import dp, bot, i18n
 from bot.misc import jinja_env
 from bot.serializers import KeyboardGenerator, MessageSender
+from bot.utils.cache import keyboard_cache
 from bot.utils.callback_settings import short_data, two_valued_data, simple_data
 from bot.utils.filters import CourseStudent, LessonStudent
+from bot.utils.query_budget import query_budget
 
 _ = i18n.gettext
 
@@ -83,19 +85,23 @@ async def get_categories(
         await response.message.delete()
         await response.answer()
     await state.reset_state()
-    contact = await repo.ContactRepository.load_student_data('tg_id', response.from_user.id, session)
-    if not contact.student:
+    student_id = await repo.ContactRepository.get_student_id(response.from_user.id, session)
+    if not student_id:
         return await response.answer(_('Вы не зарегистрированы. Отправьте /register чтобы зарегистрироваться'))
 
-    groups = await repo.CourseCategoryRepository.get_all(session)
-    groups_btns = [(x.name, ('group_course', x.id)) for x in groups]
-    markup = KeyboardGenerator(groups_btns, row_width=2).keyboard
+    async def build():
+        groups = await repo.CourseCategoryRepository.get_all(session)
+        groups_btns = [(x.name, ('group_course', x.id)) for x in groups]
+        return KeyboardGenerator(groups_btns, row_width=2).keyboard
+
+    markup = await keyboard_cache.get_or_build('categories', None, i18n.ctx_locale.get(), build, catalog='courses')
     msg = _('Выберите группу') if markup else _('Ошибка. Нет созданных групп')
 
     await MessageSender(response.from_user.id, msg, markup=markup).send()
 
 
 @dp.callback_query_handler(short_data.filter(property='group_course'))
+@query_budget(2)
 @create_session
 async def group_courses(
         cb: types.CallbackQuery,
@@ -108,10 +114,10 @@ async def group_courses(
     await cb.message.delete()
     await cb.answer()
     category_id = int(callback_data['value'])
-    contact = await repo.ContactRepository.load_student_data('tg_id', cb.from_user.id, session)
+    student_id = await repo.ContactRepository.get_student_id(cb.from_user.id, session)
     course_btns = []
 
-    course_data = await repo.CourseRepository.get_courses(category_id, contact.student.id, session)
+    course_data = await repo.CourseRepository.get_courses(category_id, student_id, session)
     for course, studentcourse in course_data:
         txt = course.name
         if studentcourse and studentcourse.has_finished:
@@ -180,7 +186,7 @@ async def lesson_groups(
         course_id = int(deep_link.group(1))
 
     course = await repo.CourseRepository.get_lesson_inload('id', course_id, session)
-    contact = await repo.ContactRepository.load_student_data('tg_id', response.from_user.id, session)
+    contact = await repo.ContactRepository.get('tg_id', response.from_user.id, session)
 
     if await has_access(contact, course):
         received_lessons = await repo.StudentLessonRepository.student_lessons(
@@ -215,10 +221,10 @@ async def lesson_groups(
     course_id = data['course_id']
 
     course = await repo.CourseRepository.get_lesson_inload('id', course_id, session)
-    contact = await repo.ContactRepository.load_student_data('tg_id', cb.from_user.id, session)
+    student_id = await repo.ContactRepository.get_student_id(cb.from_user.id, session)
 
     received_lessons = await repo.StudentLessonRepository.lessons_by_category(
-        contact.student.id, course_id, category_id, session)
+        student_id, course_id, category_id, session)
 
     lessons = [x.lesson for x, in received_lessons] if received_lessons else [course.lessons[0]]
 
@@ -249,12 +255,11 @@ async def get_lesson(
 
     lesson = await repo.LessonRepository.get_course_inload(
         'id', int(lesson_id), session)
-    contact = await repo.ContactRepository.load_student_data(
-        'tg_id', int(response.from_user.id), session)
+    student_id = await repo.ContactRepository.get_student_id(int(response.from_user.id), session)
     kb = None
 
     student_lesson = await repo.StudentLessonRepository.get_or_create(
-        lesson.id, contact.student.id, session)
+        lesson.id, student_id, session)
 
     if not lesson.course.date_finished:
         kb = KeyboardGenerator().add(
@@ -375,7 +380,7 @@ async def dislike_notify(
 
     data = await state.get_data()
     course = await repo.CourseRepository.get('id', data['course_id'], session)
-    contact = await repo.ContactRepository.load_student_data('tg_id', msg.from_user.id, session)
+    contact = await repo.ContactRepository.get('tg_id', msg.from_user.id, session)
     record = await repo.StudentLessonRepository.lesson_data('id', data['studentlesson'], session)
     template = jinja_env.get_template('inform_dislike.html')
 
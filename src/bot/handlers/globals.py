@@ -8,6 +8,7 @@ from bot.db.schemas import StudentTable
 from bot.decorators import create_session
 from bot.misc import dp, i18n, bot
 from bot.serializers import KeyboardGenerator
+from bot.utils.cache import locale_cache
 from bot.utils.callback_settings import short_data
 from bot.utils.filters import UnknownContact
 
@@ -46,6 +47,7 @@ async def save_lang(cb: types.CallbackQuery, state: FSMContext, callback_data: d
             'tg_id': cb.from_user.id,
             'data': {'lang': chosen_lang}
         }, session)
+    await locale_cache.invalidate(cb.from_user.id)
     await state.finish()
     update = types.Update.to_object(data['processed_update'])
     await dp.process_update(update)
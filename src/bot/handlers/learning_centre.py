@@ -12,6 +12,7 @@ from bot.misc import dp, i18n
 
 from bot.db.config import SessionLocal
 from bot.serializers import MessageSender, KeyboardGenerator
+from bot.utils.cache import keyboard_cache
 from bot.utils.callback_settings import short_data
 
 _ = i18n.gettext
@@ -25,9 +26,12 @@ async def list_all(
         session: SessionLocal
 ):
     await state.reset_state()
-    lcs = await repo.LearningCentreRepository.get_lcs(session)
-    lcs_data = [(lc.title, ('lc', lc.slug)) for lc in lcs]
-    markup = KeyboardGenerator(lcs_data).keyboard
+    async def build():
+        lcs = await repo.LearningCentreRepository.get_lcs(session)
+        lcs_data = [(lc.title, ('lc', lc.slug)) for lc in lcs]
+        return KeyboardGenerator(lcs_data).keyboard
+
+    markup = await keyboard_cache.get_or_build('lcs', None, i18n.ctx_locale.get(), build, catalog='companies')
 
     await message.reply(
         _('Выберите учебный центр'),
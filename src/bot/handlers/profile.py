@@ -11,7 +11,9 @@ from bot.db.schemas import StudentTable
 from bot.decorators import create_session
 from bot.misc import dp, bot, i18n
 from bot.serializers import KeyboardGenerator
+from bot.utils.cache import locale_cache
 from bot.utils.callback_settings import short_data
+from bot.utils.query_budget import query_budget
 
 _ = i18n.gettext
 
@@ -85,6 +87,7 @@ async def profile_kb(
 
 
 @dp.message_handler(Text(equals='🧑‍🎓 Профиль'), state='*')
+@query_budget(1)
 @create_session
 async def my_profile(
         message: types.Message,
@@ -95,9 +98,9 @@ async def my_profile(
     Starting point for profile view/edit
     """
     await state.reset_state()
-    contact = await repo.ContactRepository.load_student_data('tg_id', message.from_user.id, session)
+    student = await repo.StudentRepository.get_profile(message.from_user.id, session)
     kb = KeyboardGenerator([(_('Регистрация'), ('tg_reg',))]).keyboard
-    if not contact.student:
+    if not student:
         return await message.reply(
             _('<i>Ваш статус: Незарегистрированный пользователь.\n</i>' 
               '<i>Зарегистрируйтесь и получите больше возможностей.</i>'),
@@ -105,10 +108,7 @@ async def my_profile(
             reply_markup=kb
             )
 
-    async with session:
-        session.add(contact)
-        await session.refresh(contact)
-        info, kb = await profile_kb(contact.student)
+    info, kb = await profile_kb(student)
 
     await message.reply(info, reply_markup=kb)
 
@@ -147,13 +147,10 @@ async def set_name(
     """
     data = await state.get_data()
 
-    contact = await repo.ContactRepository.load_student_data('tg_id', message.from_user.id, session)
-    await repo.StudentRepository.edit(contact.student, {'first_name': message.text}, session)
+    student = await repo.StudentRepository.get_profile(message.from_user.id, session)
+    await repo.StudentRepository.edit(student, {'first_name': message.text}, session)
 
-    async with session:
-        session.add(contact)
-        await session.refresh(contact)
-        info, kb = await profile_kb(contact.student)
+    info, kb = await profile_kb(student)
 
     await bot.delete_message(message.from_user.id, message.message_id)
     await bot.edit_message_text(
@@ -198,13 +195,10 @@ async def set_last_name(
     Saves last_name into db
     """
     data = await state.get_data()
-    contact = await repo.ContactRepository.load_student_data('tg_id', message.from_user.id, session)
-    await repo.StudentRepository.edit(contact.student, {'last_name': message.text}, session)
+    student = await repo.StudentRepository.get_profile(message.from_user.id, session)
+    await repo.StudentRepository.edit(student, {'last_name': message.text}, session)
 
-    async with session:
-        session.add(contact)
-        await session.refresh(contact)
-        info, kb = await profile_kb(contact.student)
+    info, kb = await profile_kb(student)
 
     await bot.delete_message(message.from_user.id, message.message_id)
     await bot.edit_message_text(
@@ -257,13 +251,14 @@ async def set_lang(
 
     data = await state.get_data()
 
-    contact = await repo.ContactRepository.load_student_data('tg_id', cb.from_user.id, session)
-    contact.data['lang'] = lang
+    student = await repo.StudentRepository.get_profile(cb.from_user.id, session)
+    student.contact.data['lang'] = lang
 
     async with session:
-        session.add(contact)
+        session.add(student)
         await session.commit()
-        info, kb = await profile_kb(contact.student)
+    info, kb = await profile_kb(student)
+    await locale_cache.invalidate(cb.from_user.id)
 
     await bot.edit_message_text(
         info,
@@ -307,18 +302,15 @@ async def set_phone(
     Saves phone into db
     """
     data = await state.get_data()
-    contact = await repo.ContactRepository.load_student_data('tg_id', message.from_user.id, session)
+    student = await repo.StudentRepository.get_profile(message.from_user.id, session)
     try:
         await phone_checker(message)
     except ValueError as e:
         return await bot.send_message(message.from_user.id, e)
 
-    await repo.StudentRepository.edit(contact.student, {'phone': message.text}, session)
+    await repo.StudentRepository.edit(student, {'phone': message.text}, session)
 
-    async with session:
-        session.add(contact)
-        await session.refresh(contact)
-        info, kb = await profile_kb(contact.student)
+    info, kb = await profile_kb(student)
 
     await bot.delete_message(message.from_user.id, message.message_id)
     await bot.edit_message_text(
@@ -353,6 +345,7 @@ async def change_city(
 
 
 @dp.message_handler(state=ProfileChange.city)
+@query_budget(2)
 @create_session
 async def set_city(
         message: types.Message,
@@ -364,14 +357,11 @@ async def set_city(
     """
     data = await state.get_data()
 
-    contact = await repo.ContactRepository.load_student_data('tg_id', message.from_user.id, session)
+    student = await repo.StudentRepository.get_profile(message.from_user.id, session)
 
-    await repo.StudentRepository.edit(contact.student, {'city': message.text}, session)
+    await repo.StudentRepository.edit(student, {'city': message.text}, session)
 
-    async with session:
-        session.add(contact)
-        await session.refresh(contact)
-        info, kb = await profile_kb(contact.student)
+    info, kb = await profile_kb(student)
 
     await bot.delete_message(message.from_user.id, message.message_id)
     await bot.edit_message_text(
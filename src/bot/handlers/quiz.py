@@ -1,4 +1,5 @@
 import re
+import time
 from typing import Optional, Union
 
 from aiogram import types
@@ -9,11 +10,14 @@ from aiogram.types import InlineKeyboardMarkup, ContentType
 
 from bot import repository as repo, config
 from bot.db.config import SessionLocal
-from bot.db.schemas import FormAnswerTable, FormQuestionTable, AccessLevel
+from bot.db.schemas import AccessLevel
 from bot.decorators import create_session
 from bot.misc import dp, i18n, bot, jinja_env
 from bot.serializers import KeyboardGenerator, FormButtons, MessageSender
+from bot.utils.cache import keyboard_cache
 from bot.utils.callback_settings import short_data, simple_data, two_valued_data
+from bot.utils.form_graph import Answer, FormGraph, Question, get_answer_form_id, get_form_graph
+from bot.utils.quiz_state import QuizState
 from bot.utils.throttling import throttled
 
 # todo: need to localize
@@ -30,39 +34,29 @@ async def _normalize_end_msg(msg: str):
 
 
 async def store_answer(
-        question: FormQuestionTable,
+        question: Question,
         answer: str,
         state: FSMContext,
+        is_correct: bool = False,
 ):
-    data = await state.get_data()
-    previous_answers = data.get('answers') if data.get('answers') else {}
-    key = str(question.id)
-
+    quiz = QuizState(state.user, question.form_id)
     if question.multi_answer:
-        if previous_answers.get(key) and answer in previous_answers.get(key):
-            previous_answers[key].remove(answer)
-        else:
-            previous_answers.setdefault(key, [])
-            previous_answers[key].append(answer)
+        await quiz.toggle_answer(question.id, answer, is_correct)
     else:
-        previous_answers[key] = answer
+        await quiz.set_answer(question.id, answer)
 
-    await state.update_data({'answers': previous_answers})
 
-
-@create_session
 async def start_question_sending(
         form_id: int,
         chat_id: int,
         message_id: int,
         state: FSMContext,
-        session: SessionLocal,
-        answer: Optional = None,
+        answer: Optional[Answer] = None,
 ):
-    form = await repo.FormRepository.get_questions(int(form_id), session)
+    form = await get_form_graph(int(form_id))
 
     if not form.questions:
-        await MessageSender(chat_id, 'Ошибка').send()
+        return await MessageSender(chat_id, 'Ошибка').send()
 
     async with state.proxy() as data:
         data['form_id'] = int(form_id)
@@ -72,9 +66,10 @@ async def start_question_sending(
             'question_len': 1,
             'current_question_id': form.questions[0].id,
             'position': form.questions[0].position,
-            'answers': {},
-            'score': 0,
+            'checkpoint_len': 0,
+            'checkpoint_at': time.time(),
         })
+        await QuizState(chat_id, form.id).reset()
 
         kb = await FormButtons(form, form.questions[0]).question_buttons()
 
@@ -90,6 +85,26 @@ async def start_question_sending(
         await next_question(chat_id, state)
 
 
+def is_checkpoint(data: dict) -> bool:
+    """
+    Whether answers of quiz in progress should be saved to db
+    """
+    return (
+        data['question_len'] - data.get('checkpoint_len', 0) >= config.QUIZ_CHECKPOINT_ANSWERS
+        or time.time() - data.get('checkpoint_at', 0) >= config.QUIZ_CHECKPOINT_SECONDS
+    )
+
+
+async def save_answers(chat_id: int, data: dict, session: SessionLocal):
+    """
+    Save answers of the quiz from redis to db. Adds them with score to data
+    """
+    contact = await repo.ContactRepository.get('tg_id', chat_id, session)
+    data['answers'], data['score'] = await QuizState(chat_id, data['form_id']).load()
+    await repo.ContactFormRepository.create_or_edit(contact.id, data['form_id'], data, session)
+    return contact
+
+
 @create_session
 async def next_question(
         chat_id: int,
@@ -97,30 +112,28 @@ async def next_question(
         session: SessionLocal = None
 ):
     data = await state.get_data()
+    form = await get_form_graph(data['form_id'])
     if data.get('jump_to_question'):
         async with state.proxy() as data:
             jump_to_id = data.pop('jump_to_question')
-        question = await repo.FormQuestionRepository.get('id', jump_to_id, session)
+        question = form.question(jump_to_id)
     else:
-        question = await repo.FormQuestionRepository.next_question(
-            data['position'],
-            data['form_id'],
-            session
-        )
+        question = form.next_question(data['position'])
 
-    contact = await repo.ContactRepository.get('tg_id', chat_id, session)
     data = await state.get_data()
-    form = await repo.FormRepository.get('id', data['form_id'], session)
-    await repo.ContactFormRepository.create_or_edit(contact.id, data['form_id'], data, session)
 
     if question:
         count = data['question_len'] + 1
-        await state.update_data({
+        progress = {
             'question_len': count,
             'current_question_id': question.id,
             'position': question.position,
-        })
-        kb = await FormButtons(question.form, question).question_buttons()
+        }
+        if is_checkpoint(data):
+            await save_answers(chat_id, data, session)
+            progress.update(checkpoint_len=data['question_len'], checkpoint_at=time.time())
+        await state.update_data(progress)
+        kb = await FormButtons(form, question).question_buttons()
 
         await MessageSender(
             chat_id,
@@ -129,25 +142,22 @@ async def next_question(
             markup=kb
         ).send()
     else:
+        contact = await save_answers(chat_id, data, session)
         await finish_form(data, form, contact)
         await state.finish()
+        await QuizState(chat_id, data['form_id']).reset()
 
 
 async def process_multianswer(
         cb: types.CallbackQuery,
-        answer: FormAnswerTable,
-        state: FSMContext,
+        answer: Answer,
+        question: Question,
         keyboard: InlineKeyboardMarkup
 ):
-    async with state.proxy() as data:
-        if 'is_correct' not in data:
-            data['is_correct'] = [answer.is_correct]
-        else:
-            data['is_correct'].append(answer.is_correct)
-    kb = await FormButtons(answer.question.form_id).mark_selected(
+    kb = await FormButtons(question.form_id).mark_selected(
         answer.id,
         answer.question_id,
-        answer.question.position,
+        question.position,
         keyboard.to_python()
     )
 
@@ -166,16 +176,13 @@ async def open_lesson(lesson_id, contact, user_scored, session):
         )
 
 
-async def finish_form(data, form, contact):
+async def finish_form(data, form: FormGraph, contact):
     percent_score = round((data['score'] / data['question_len']) * 100)
     if data.get('lesson_id'):
         await open_lesson(data.get('lesson_id'), contact, percent_score)
 
-    end_message = _('Спасибо за участие!')
-    for key in form.end_message.keys():
-        num1, num2 = map(int, key.split('-'))
-        if percent_score in range(num1, num2 + 1):
-            end_message = await _normalize_end_msg(form.end_message[key])
+    end_message = form.end_message(percent_score)
+    end_message = await _normalize_end_msg(end_message) if end_message else _('Спасибо за участие!')
     kb = await KeyboardGenerator.main_kb(contact.tg_id)
     await MessageSender(contact.tg_id, end_message, markup=kb).send()
 
@@ -192,9 +199,12 @@ async def display_forms(
     if type(response) == types.CallbackQuery:
         await response.answer()
 
-    forms = await repo.FormRepository.get_public(session)
-    form_data = [(form.name, ('form', form.id)) for form in forms]
-    markup = KeyboardGenerator(form_data).keyboard
+    async def build():
+        forms = await repo.FormRepository.get_public(session)
+        form_data = [(form.name, ('form', form.id)) for form in forms]
+        return KeyboardGenerator(form_data).keyboard
+
+    markup = await keyboard_cache.get_or_build('forms', None, i18n.ctx_locale.get(), build, catalog='forms')
     message_id = response.message_id if type(response) == types.Message else None
 
     await bot.send_message(
@@ -304,29 +314,29 @@ async def start_form(
 
 @dp.callback_query_handler(short_data.filter(property='answer'))
 @dp.throttled(throttled, rate=.7)
-@create_session
 async def get_inline_answer(
         cb: types.CallbackQuery,
-        session: SessionLocal,
         state: FSMContext,
         callback_data: dict = None
 ):
     await cb.answer()
-    answer = await repo.FormAnswerRepository.load_all_relationships(int(callback_data['value']), session)
-    await store_answer(answer.question, answer.text, state)
+    answer_id = int(callback_data['value'])
+    form = await get_form_graph(await get_answer_form_id(answer_id))
+    answer = form.answer(answer_id)
+    question = form.question(answer.question_id)
+    await store_answer(question, answer.text, state, answer.is_correct)
 
     if answer.jump_to_id:
         await state.update_data({'jump_to_question': answer.jump_to_id})
 
-    if answer.question.multi_answer:
-        await process_multianswer(cb, answer, state, cb.message.reply_markup)
+    if question.multi_answer:
+        await process_multianswer(cb, answer, question, cb.message.reply_markup)
     else:
-        async with state.proxy() as data:
-            if answer.is_correct:
-                data['score'] += 1
+        if answer.is_correct:
+            await QuizState(cb.from_user.id, form.id).add_score()
 
         await start_question_sending(
-            answer.question.form.id,
+            form.id,
             cb.from_user.id,
             cb.message.message_id,
             state,
@@ -343,10 +353,12 @@ async def proceed(
 ):
     await cb.answer()
     await cb.message.edit_reply_markup(None)
+    question_id = int(callback_data['first_value'])
     async with state.proxy() as data:
-        if all(data['is_correct']):
-            data['score'] += 1
-        data['current_question_id'] = int(callback_data['first_value'])
+        quiz = QuizState(cb.from_user.id, data['form_id'])
+        if await quiz.is_correct(question_id):
+            await quiz.add_score()
+        data['current_question_id'] = question_id
         data['position'] = int(callback_data['second_value'])
 
     await next_question(cb.from_user.id, state)
@@ -382,19 +394,14 @@ async def file_answer(
 
 @dp.message_handler(state=QuestionnaireMode.accept_text)
 @dp.throttled(throttled, rate=.7)
-@create_session
 async def get_text_answer(
         message: types.Message,
         state: FSMContext,
-        session: SessionLocal
 ):
     await state.reset_state(False)
     data = await state.get_data()
-    question = await repo.FormQuestionRepository.get(
-        'id',
-        data['current_question_id'],
-        session
-    )
+    form = await get_form_graph(data['form_id'])
+    question = form.question(data['current_question_id'])
     await store_answer(question, message.text, state)
 
     await next_question(message.from_user.id, state)
@@ -410,13 +417,10 @@ async def get_file_answer(
         session: SessionLocal
 ):
     await state.reset_state(False)
-    contact = await repo.ContactRepository.load_student_data('tg_id', message.from_user.id, session)
+    contact = await repo.ContactRepository.get('tg_id', message.from_user.id, session)
     data = await state.get_data()
-    question = await repo.FormQuestionRepository.get(
-        'id',
-        data['current_question_id'],
-        session
-    )
+    form = await get_form_graph(data['form_id'])
+    question = form.question(data['current_question_id'])
     if message.content_type is not ContentType.PHOTO:
         filename = getattr(message, message.content_type).file_name
     else:
@@ -426,7 +430,7 @@ async def get_file_answer(
     chat_id = question.chat_id if question.chat_id else config.CHAT_ID
 
     text = jinja_env.get_template('quiz_file.html')
-    await bot.send_message(chat_id, text.render(question=question, form=question.form, contact=contact))
+    await bot.send_message(chat_id, text.render(question=question, form=form, contact=contact))
     await bot.forward_message(chat_id, message.from_user.id, message.message_id)
 
     await next_question(message.from_user.id, state)
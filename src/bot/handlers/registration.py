@@ -15,6 +15,7 @@ from bot.db.schemas import StudentTable
 from bot.decorators import create_session
 from bot.misc import dp, bot, i18n
 from bot.serializers import KeyboardGenerator
+from bot.utils.cache import access_level_cache
 from bot.utils.callback_settings import simple_data
 from bot.utils.throttling import throttled
 
@@ -136,6 +137,7 @@ async def create_lead(
     }
 
     student = await repo.StudentRepository.create(lead_data, session)
+    access_level_cache.delete(user_id)
     await repo.ContactRepository.edit(contact, {
         'is_registered': True
     }, session)
@@ -5,5 +5,7 @@ from loguru import logger
 def setup(dispatcher: Dispatcher):
     logger.info("Configure middlewares...")
     from bot.misc import i18n
+    from bot.middlewares.session import SessionMiddleware
 
+    dispatcher.middleware.setup(SessionMiddleware())
     dispatcher.middleware.setup(i18n)
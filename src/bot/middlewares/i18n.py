@@ -6,6 +6,7 @@ from aiogram.contrib.middlewares.i18n import I18nMiddleware as BaseI18nMiddlewar
 from bot import repository as repo
 from bot.db.schemas import StudentTable
 from bot.decorators import create_session
+from bot.utils.cache import locale_cache
 
 
 class I18nMiddleware(BaseI18nMiddleware):
@@ -15,10 +16,13 @@ class I18nMiddleware(BaseI18nMiddleware):
         Middleware function to return locale to handlers
         """
         message: types.Message = args[0]
-        contact = await repo.ContactRepository.get('tg_id', message.from_user.id, session)
-        lang = self.default
-        if contact:
-            lang = StudentTable.LanguageType(contact.data.get('lang', StudentTable.LanguageType.ru)).name
+        lang = await locale_cache.get(message.from_user.id)
+        if lang is None:
+            contact = await repo.ContactRepository.get('tg_id', message.from_user.id, session)
+            lang = self.default
+            if contact:
+                lang = StudentTable.LanguageType(contact.data.get('lang', StudentTable.LanguageType.ru)).name
+                await locale_cache.set(message.from_user.id, lang)
         *_, data = args
         data['locale'] = lang
         return data['locale']
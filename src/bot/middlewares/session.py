@@ -0,0 +1,67 @@
+from contextvars import ContextVar
+from typing import Optional
+
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.db.config import engine
+
+# Session of the update being processed. Filters, middlewares and handlers share it
+current_session: ContextVar[Optional[AsyncSession]] = ContextVar('current_session', default=None)
+
+
+class RequestSession(AsyncSession):
+    """
+    Session living as long as the update is processed.
+
+    Repositories wrap every query into `async with session`. Exiting the block
+    closes the session like a plain AsyncSession does: the connection is returned
+    to the pool while handler awaits telegram and uncommitted changes are discarded,
+    writes are committed explicitly. The session stays usable for the next block
+    and is closed by SessionMiddleware when update is processed.
+
+    Objects loaded through the session may be remembered in `identity_cache`
+    until anything is committed or rolled back, closing keeps them loaded.
+    """
+
+    @property
+    def identity_cache(self) -> dict:
+        return self.info.setdefault('identity_cache', {})
+
+    async def __aexit__(self, type_, value, traceback):
+        if type_ is not None:
+            await self.rollback()
+        await self.close()
+
+    async def commit(self):
+        self.identity_cache.clear()
+        await super().commit()
+
+    async def rollback(self):
+        self.identity_cache.clear()
+        await super().rollback()
+
+
+class SessionMiddleware(BaseMiddleware):
+    """
+    Open one database session per telegram update
+    """
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        if current_session.get() is not None:
+            # Update is processed from inside of another one, e.g. by dp.process_update
+            data['session'] = current_session.get()
+            return
+        session = RequestSession(engine, expire_on_commit=False)
+        data['session'] = session
+        data['_session_token'] = current_session.set(session)
+
+    async def on_post_process_update(self, update: types.Update, result, data: dict):
+        token = data.pop('_session_token', None)
+        if token is None:
+            return
+        try:
+            await data['session'].close()
+        finally:
+            current_session.reset(token)
@@ -1,20 +1,21 @@
 from pathlib import Path
 
 import sentry_sdk
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram.contrib.fsm_storage.redis import RedisStorage2
 from jinja2 import Environment, PackageLoader, select_autoescape
 from loguru import logger
 
 from bot import config
 from bot.middlewares.i18n import I18nMiddleware
+from bot.utils.dispatcher import OrderedDispatcher
 
 bot = Bot(token=config.BOT_TOKEN, parse_mode='html')
 redis = RedisStorage2(
     host=config.REDIS_HOST, port=config.REDIS_PORT,
     state_ttl=60, db=config.DATABASES['FSM']
 )
-dp = Dispatcher(bot, storage=redis)
+dp = OrderedDispatcher(bot, storage=redis, concurrency=config.BOT_CONCURRENCY)
 jinja_env = Environment(
     loader=PackageLoader('bot'),
     autoescape=select_autoescape(),
@@ -1,19 +1,24 @@
 import datetime
+from collections import Counter
 from contextlib import suppress
 from typing import Any
 
 from sqlalchemy import select, func, or_, and_
 from sqlalchemy import exc
-from sqlalchemy.orm import selectinload, with_parent, subqueryload, contains_eager
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload, with_parent, subqueryload, contains_eager, joinedload
 
 from bot.db.schemas import (
-    StudentTable, CourseTable, StudentCourse,
+    AccessLevel, StudentTable, CourseTable, StudentCourse,
     LessonTable, StudentLesson,
     ContactTable, FormTable, FormQuestionTable, FormAnswerTable,
-    ContactFormTable, CompanyTable, AssetTable, ContactAssetTable,
+    ContactFormTable, FormAnswerTallyTable, CompanyTable, AssetTable, ContactAssetTable,
     MessageHistory, CourseCategoryTable
 )
 from bot.db.config import SessionLocal
+from bot.middlewares.session import RequestSession
+from bot.utils.cache import catalog_cache, access_level_cache
+from bot.utils.form_graph import get_form_graph
 
 
 class BaseRepository:
@@ -86,14 +91,54 @@ class ContactRepository(BaseRepository):
 
     @classmethod
     async def get(cls, attribute: str, value: Any, session: SessionLocal):
+        """
+        Contact is requested by middlewares, filters and handler of the same update,
+        so within update session it is loaded once
+        """
+        cache_key = (cls.table, attribute, value)
+        if isinstance(session, RequestSession) and cache_key in session.identity_cache:
+            return session.identity_cache[cache_key]
+
         async with session:
             instance = (await session.execute(
                 select(cls.table).where(getattr(cls.table, attribute) == value)
                 .options(selectinload(ContactTable.student))
+                .execution_options(populate_existing=True)
             )).scalar()
 
+        if instance and isinstance(session, RequestSession):
+            session.identity_cache[cache_key] = instance
         return instance
 
+    @staticmethod
+    async def get_access_level(tg_id: int, session: SessionLocal) -> AccessLevel:
+        """
+        Access level of contact. Only selects whether contact has student and if it is a client
+        """
+        level = access_level_cache.get(tg_id)
+        if level is not None:
+            return level
+
+        async with session:
+            row = (await session.execute(
+                select(StudentTable.id, StudentTable.is_client)
+                .select_from(ContactTable)
+                .join(StudentTable, StudentTable.contact_id == ContactTable.id, isouter=True)
+                .where(ContactTable.tg_id == tg_id)
+            )).first()
+        if not row:
+            return AccessLevel.contact
+
+        student_id, is_client = row
+        if student_id is None:
+            level = AccessLevel.contact
+        elif is_client is False:
+            level = AccessLevel.lead
+        else:
+            level = AccessLevel.client
+        access_level_cache.set(tg_id, level)
+        return level
+
     @staticmethod
     async def get_or_create(
             tg_id: int,
@@ -120,27 +165,38 @@ class ContactRepository(BaseRepository):
         return contact
 
     @staticmethod
-    async def load_student_data(attr: Any, value, session: SessionLocal):
+    async def get_student_id(tg_id: int, session: SessionLocal):
         """
-        load contact with student relationship
+        Return id of student of contact or None if contact is not registered
         """
         async with session:
-            contact = (await session.execute(
-                select(ContactTable).where(
-                    getattr(ContactTable, attr) == value).options(
-                    selectinload(ContactTable.student).options(
-                        selectinload(StudentTable.company),
-                        selectinload(StudentTable.courses)
-                        .selectinload(StudentCourse.courses)
-                        .selectinload(CourseTable.lessons)))
+            student_id = (await session.execute(
+                select(StudentTable.id)
+                .join(ContactTable, StudentTable.contact_id == ContactTable.id)
+                .where(ContactTable.tg_id == tg_id)
             )).scalar()
 
-        return contact
+        return student_id
 
 
 class StudentRepository(BaseRepository):
     table = StudentTable
 
+    @staticmethod
+    async def get_profile(tg_id: int, session: SessionLocal):
+        """
+        Load student with contact and company to render profile in a single SELECT
+        """
+        async with session:
+            student = (await session.execute(
+                select(StudentTable)
+                .join(StudentTable.contact)
+                .where(ContactTable.tg_id == tg_id)
+                .options(contains_eager(StudentTable.contact), joinedload(StudentTable.company))
+            )).scalar()
+
+        return student
+
     @staticmethod
     async def load_with_lc(attribute: str, value: any, session: SessionLocal):
         async with session:
@@ -182,11 +238,16 @@ class CourseCategoryRepository(BaseRepository):
 
     @staticmethod
     async def get_all(session: SessionLocal):
-        async with session:
-            categories = (await session.execute(
-                select(CourseCategoryTable)
-            )).scalars()
-        return categories
+        """
+        Categories are served from catalog cache. Session is kept for compatibility
+        """
+        async def load():
+            async with SessionLocal() as catalog_session:
+                return (await catalog_session.execute(
+                    select(CourseCategoryTable)
+                )).scalars().all()
+
+        return await catalog_cache.get_or_load('courses', 'categories', load)
 
 
 class CourseRepository(BaseRepository):
@@ -210,18 +271,20 @@ class CourseRepository(BaseRepository):
     @staticmethod
     async def get_lesson_inload(attribute: str, value: Any, session: SessionLocal):
         """
-        Emits a second (or more) SELECT statement to load Lessons at once from CourseTable
+        Emits a second (or more) SELECT statement to load Lessons at once from CourseTable.
+        Course is served from catalog cache detached from session
         """
-        async with session:
-            course = (await session.execute(
-                select(CourseTable).where(
-                    getattr(CourseTable, attribute) == value
-                ).options(
-                    selectinload(CourseTable.lessons)
-                    .selectinload(LessonTable.category)
-                ))).scalar()
+        async def load():
+            async with SessionLocal() as catalog_session:
+                return (await catalog_session.execute(
+                    select(CourseTable).where(
+                        getattr(CourseTable, attribute) == value
+                    ).options(
+                        selectinload(CourseTable.lessons)
+                        .selectinload(LessonTable.category)
+                    ))).scalar()
 
-        return course
+        return await catalog_cache.get_or_load('courses', ('course', attribute, value), load)
 
 
 class LessonRepository(BaseRepository):
@@ -377,11 +440,16 @@ class LearningCentreRepository(BaseRepository):
 
     @staticmethod
     async def get_lcs(session):
-        async with session:
-            lcs = (await session.execute(
-                select(CompanyTable)
-            )).scalars()
-        return lcs
+        """
+        Learning centres are served from catalog cache. Session is kept for compatibility
+        """
+        async def load():
+            async with SessionLocal() as catalog_session:
+                return (await catalog_session.execute(
+                    select(CompanyTable)
+                )).scalars().all()
+
+        return await catalog_cache.get_or_load('companies', 'lcs', load)
 
 
 class StudentCourseRepository(BaseRepository):
@@ -466,11 +534,16 @@ class FormRepository(BaseRepository):
 
     @staticmethod
     async def get_public(session: SessionLocal):
-        async with session:
-            forms = (
-                await session.execute(
-                    select(FormTable).where(FormTable.type == 'public'))).scalars()
-        return forms
+        """
+        Public forms are served from catalog cache. Session is kept for compatibility
+        """
+        async def load():
+            async with SessionLocal() as catalog_session:
+                return (
+                    await catalog_session.execute(
+                        select(FormTable).where(FormTable.type == 'public'))).scalars().all()
+
+        return await catalog_cache.get_or_load('forms', 'public', load)
 
     @staticmethod
     async def get_questions(form_id, session):
@@ -560,23 +633,55 @@ class ContactFormRepository(BaseRepository):
 
     @staticmethod
     async def create_or_edit(contact_id, form_id, data, session):
+        """
+        Save answers of contact. Difference with previously saved answers
+        is applied to tallies of the form in the same transaction
+        """
         student_form = await ContactFormRepository.get_one(
             contact_id, form_id, session)
-
-        payload = {
-            'contact_id': contact_id,
-            'form_id': form_id,
-            'score': data['score'],
-            'data': data['answers'],
-        }
-        if not student_form:
-            student_form = await ContactFormRepository.create(payload, session)
-        else:
-            student_form = await ContactFormRepository.edit(student_form, payload, session)
+        graph = await get_form_graph(form_id)
+        delta = Counter()
+        if graph:
+            delta.update(graph.answer_counts(data['answers']))
+            if student_form:
+                delta.subtract(graph.answer_counts(student_form.data))
+
+        async with session:
+            if not student_form:
+                student_form = ContactFormTable(contact_id=contact_id, form_id=form_id)
+            session.add(student_form)
+            student_form.score = data['score']
+            student_form.data = data['answers']
+            await FormAnswerTallyRepository.add(form_id, delta, session)
+            await session.commit()
 
         return student_form
 
 
+class FormAnswerTallyRepository(BaseRepository):
+    table = FormAnswerTallyTable
+
+    @staticmethod
+    async def add(form_id, delta, session):
+        """
+        Add delta of counts by (question_id, answer_id) to tallies, without commit
+        """
+        now = datetime.datetime.now()
+        # Rows are upserted in the same order by every transaction to avoid deadlocks
+        rows = [
+            {'form_id': form_id, 'question_id': question_id, 'answer_id': answer_id,
+             'count': count, 'created_at': now}
+            for (question_id, answer_id), count in sorted(delta.items()) if count
+        ]
+        if not rows:
+            return
+        stmt = insert(FormAnswerTallyTable).values(rows)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=['form_id', 'question_id', 'answer_id'],
+            set_={'count': FormAnswerTallyTable.count + stmt.excluded.count, 'updated_at': now}
+        ))
+
+
 class AssetRepository(BaseRepository):
     table = AssetTable
 
@@ -1,4 +1,3 @@
-import hashlib
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Union, Tuple, Any
@@ -13,15 +12,17 @@ from aiogram.types import (
 from bot import config
 from bot import repository as repo
 from bot.config import DATABASES
-from bot.db.schemas import FormTable, FormQuestionTable, FormAnswerTable
+from bot.db.schemas import FormTable, FormQuestionTable, FormAnswerTable, AccessLevel
 from bot.decorators import create_session
-from bot.misc import bot
+from bot.misc import bot, i18n
+from bot.utils.cache import keyboard_cache
 from bot.utils.callback_settings import (
     simple_data,
     short_data,
     two_valued_data,
     three_valued_data
 )
+from general.utils.media_cache import AsyncMediaCache
 
 question_redis = RedisStorage2(
     host=config.REDIS_HOST,
@@ -31,11 +32,25 @@ question_redis = RedisStorage2(
 ROOT_DIR = Path(__file__).parent.parent
 
 
+def _reply_keyboard(*titles: str) -> str:
+    return ReplyKeyboardMarkup(resize_keyboard=True).add(
+        *[KeyboardButton(title) for title in titles]
+    ).as_json()
+
+
+_STUDENT_KEYBOARD = _reply_keyboard('📝 Курсы', '🧑‍🎓 Профиль', '🤔 Опросники', '🏫 Центры', '🛠️ Ассеты')
+MAIN_KEYBOARDS = {
+    AccessLevel.contact: _reply_keyboard('🧑‍🎓 Профиль', '🤔 Опросники'),
+    AccessLevel.lead: _STUDENT_KEYBOARD,
+    AccessLevel.client: _STUDENT_KEYBOARD,
+}
+
+
 class MessageSender:
     def __init__(self, chat_id: int, text: str = None, photo: str = None,
                  video: str = None, duration: int = None, width: int = None,
                  height: int = None, thumbnail: Union[int, str] = None, file: str = None,
-                 markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup] = None):
+                 markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, str] = None):
         self.chat_id = chat_id
         self.file = file
         self.text = text
@@ -105,25 +120,37 @@ class MessageSender:
             return 'file'
 
     async def _cache_media(self):
-        redis = await question_redis.redis()
+        media_cache = AsyncMediaCache(await question_redis.redis())
         media_attr = await self._get_media_attr()
         path = ROOT_DIR / 'media' / getattr(self, media_attr)
-        hashed_filepath = hashlib.md5(str(path).encode()).hexdigest()
-        media_object = await redis.get(hashed_filepath, encoding='utf8')
+        key = await media_cache.key(media_attr, str(path))
+        media_object = await media_cache.get(key)
         wait_message = None
+        is_uploader = False
 
         if not media_object:
             wait_message = await bot.send_message(self.chat_id, 'Пожалуйста, подождите ⏳')
+            # Only one sender uploads the file, others reuse its file_id
+            is_uploader = await media_cache.lock(key)
+            if not is_uploader:
+                media_object = await media_cache.wait(key)
+
+        is_upload = not media_object
+        if is_upload:
             media_object = InputFile(path)
 
         self.set_media(media_attr, media_object)
 
-        resp = await self._send()
+        try:
+            resp = await self._send()
+            if is_upload:
+                await media_cache.set(key, await self._get_file_id(resp, media_attr))
+        finally:
+            if is_uploader:
+                await media_cache.unlock(key)
 
         if wait_message:
             await wait_message.delete()
-            key = await self._get_file_id(resp, media_attr)
-            await redis.set(hashed_filepath, key)
 
     async def send(self):
         if self.photo or self.video or self.file:
@@ -198,25 +225,12 @@ class KeyboardGenerator:
 
     @staticmethod
     @create_session
-    async def main_kb(tg_id, session):
-        contact = await repo.ContactRepository.load_student_data('tg_id', tg_id, session)
-        btns = [
-            KeyboardButton('📝 Курсы'),
-            KeyboardButton('🧑‍🎓 Профиль'),
-            KeyboardButton('🤔 Опросники'),
-            KeyboardButton('🏫 Центры'),
-            KeyboardButton('🛠️ Ассеты'),
-        ]
-
-        if not contact.student:
-            btns = [
-                KeyboardButton('🧑‍🎓 Профиль'),
-                KeyboardButton('🤔 Опросники'),
-            ]
-        kb = ReplyKeyboardMarkup(resize_keyboard=True)
-        kb.add(*btns)
-
-        return kb
+    async def main_kb(tg_id, session) -> str:
+        """
+        Return serialized main keyboard prebuilt for access level of contact
+        """
+        level = await repo.ContactRepository.get_access_level(tg_id, session)
+        return MAIN_KEYBOARDS[level]
 
     @staticmethod
     async def main_kb_inline(client_id):
@@ -256,13 +270,21 @@ class FormButtons(KeyboardGenerator):
 
         return self.keyboard
 
-    async def question_buttons(self):
-        data = [(answer.text, ('answer', answer.id)) for answer in self.question.answers]
-        row_width = 1 if self.question.one_row_btns else 3
-        kb = KeyboardGenerator(data, row_width=row_width)
-        if self.question.custom_answer:
-            text = self.question.custom_answer_text if self.question.custom_answer_text else 'Другое'
-            kb.add((text, ('custom_answer',)))
-        elif self.question.accept_file:
-            kb.add(('Отправить файл', ('file_answer',)))
-        return kb.keyboard
+    async def question_buttons(self) -> str:
+        """
+        Return serialized keyboard of question. It is the same for every respondent
+        """
+        async def build():
+            data = [(answer.text, ('answer', answer.id)) for answer in self.question.answers]
+            row_width = 1 if self.question.one_row_btns else 3
+            kb = KeyboardGenerator(data, row_width=row_width)
+            if self.question.custom_answer:
+                text = self.question.custom_answer_text if self.question.custom_answer_text else 'Другое'
+                kb.add((text, ('custom_answer',)))
+            elif self.question.accept_file:
+                kb.add(('Отправить файл', ('file_answer',)))
+            return kb.keyboard
+
+        return await keyboard_cache.get_or_build(
+            'question', self.question.id, i18n.ctx_locale.get(), build, catalog='forms'
+        )
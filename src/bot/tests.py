@@ -0,0 +1,100 @@
+import os
+from itertools import count
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Budgets of handlers are resolved when they are decorated, so strict mode is enabled before import
+os.environ['QUERY_BUDGET_STRICT'] = 'true'
+
+from sqlalchemy import text
+
+from bot.db.config import SessionLocal
+from bot.db.schemas import ContactTable, StudentTable
+from bot.handlers.courses import group_courses
+from bot.handlers.profile import my_profile, set_city
+from bot.utils.query_budget import query_budget, QueryBudgetExceeded
+
+sequence = count(10 ** 12)
+
+
+async def execute(amount: int) -> None:
+    async with SessionLocal() as session:
+        for _ in range(amount):
+            await session.execute(text('SELECT 1'))
+
+
+class QueryBudgetTest(IsolatedAsyncioTestCase):
+    """
+    Budget counts queries of the block and raises in strict mode only
+    """
+
+    async def test_within_budget(self):
+        async with query_budget(2, strict=True) as budget:
+            await execute(2)
+        self.assertEqual(budget.count, 2)
+
+    async def test_over_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            async with query_budget(1, strict=True):
+                await execute(2)
+
+    async def test_over_budget_decorated(self):
+        handler = query_budget(1, strict=True)(execute)
+        with self.assertRaises(QueryBudgetExceeded):
+            await handler(2)
+
+    async def test_over_budget_not_strict(self):
+        async with query_budget(1, strict=False) as budget:
+            await execute(2)
+        self.assertEqual(budget.count, 2)
+
+
+class HandlerBudgetTest(IsolatedAsyncioTestCase):
+    """
+    Handlers stay within their budgets. Runs against database migrated by Django,
+    telegram calls are mocked
+    """
+
+    async def asyncSetUp(self):
+        tg_id = next(sequence)
+        self.contact = ContactTable(first_name='Контакт', tg_id=tg_id)
+        self.student = StudentTable(first_name='Студент', city='-', phone=str(tg_id), contact=self.contact)
+        async with SessionLocal() as session:
+            session.add_all([self.contact, self.student])
+            await session.commit()
+
+    async def asyncTearDown(self):
+        async with SessionLocal() as session:
+            await session.delete(await session.get(StudentTable, self.student.id))
+            await session.delete(await session.get(ContactTable, self.contact.id))
+            await session.commit()
+
+    def message(self) -> MagicMock:
+        message = MagicMock()
+        message.from_user.id = self.contact.tg_id
+        message.reply = AsyncMock()
+        return message
+
+    async def test_my_profile(self):
+        message = self.message()
+        await my_profile(message, state=AsyncMock())
+        message.reply.assert_awaited_once()
+
+    async def test_set_city(self):
+        message = self.message()
+        message.text = 'Ташкент'
+        state = AsyncMock()
+        state.get_data.return_value = {'message_id': 1}
+        with patch('bot.handlers.profile.bot', AsyncMock()):
+            await set_city(message, state)
+        state.finish.assert_awaited_once()
+
+    async def test_group_courses(self):
+        cb = MagicMock()
+        cb.from_user.id = self.contact.tg_id
+        cb.message.delete = AsyncMock()
+        cb.answer = AsyncMock()
+        with patch('bot.handlers.courses.MessageSender') as sender:
+            sender.return_value.send = AsyncMock()
+            await group_courses(cb, {'value': '0'})
+        sender.return_value.send.assert_awaited_once()
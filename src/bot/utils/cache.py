@@ -0,0 +1,176 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from aiogram.contrib.fsm_storage.redis import RedisStorage2
+
+from bot import config
+
+cache_redis = RedisStorage2(
+    host=config.REDIS_HOST,
+    port=config.REDIS_PORT,
+    db=config.DATABASES['CUSTOM_DATA']
+)
+
+# Versions are bumped by django on save and delete, see general.utils.cache
+CATALOG_VERSION_KEY = 'catalog:version:{}'
+LOCALE_VERSION_KEY = 'locale:version'
+
+
+class TTLCache:
+    """
+    In-process cache of bounded size. Entries expire after ttl seconds,
+    least recently used entries are evicted when cache is full
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            expires, value = self._data[key]
+        except KeyError:
+            return default
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocaleCache:
+    """
+    Locale of contacts by their telegram id.
+
+    Memory tier answers most of the updates, redis tier is shared by bot processes
+    and survives restarts. Changing a locale, by bot or admin, drops it from redis
+    and bumps the version of locales, so every process reloads its memory tier
+    from redis.
+    """
+    prefix = 'locale'
+
+    def __init__(self, maxsize: int, ttl: float, redis_ttl: int = 0):
+        self.memory = TTLCache(maxsize, ttl)
+        self.redis_ttl = redis_ttl
+
+    async def version(self) -> int:
+        redis = await cache_redis.redis()
+        return int(await redis.get(LOCALE_VERSION_KEY) or 0)
+
+    async def get(self, tg_id: int) -> Optional[str]:
+        version = await self.version()
+        cached_version, locale = self.memory.get(tg_id, (None, None))
+        if cached_version != version:
+            locale = None
+        if locale is None and self.redis_ttl:
+            redis = await cache_redis.redis()
+            locale = await redis.get(f'{self.prefix}:{tg_id}', encoding='utf8')
+            if locale is not None:
+                self.memory.set(tg_id, (version, locale))
+        return locale
+
+    async def set(self, tg_id: int, locale: str) -> None:
+        self.memory.set(tg_id, (await self.version(), locale))
+        if self.redis_ttl:
+            redis = await cache_redis.redis()
+            await redis.set(f'{self.prefix}:{tg_id}', locale, expire=self.redis_ttl)
+
+    async def invalidate(self, tg_id: int) -> None:
+        self.memory.delete(tg_id)
+        redis = await cache_redis.redis()
+        transaction = redis.multi_exec()
+        transaction.delete(f'{self.prefix}:{tg_id}')
+        transaction.incr(LOCALE_VERSION_KEY)
+        await transaction.execute()
+
+
+locale_cache = LocaleCache(
+    config.LOCALE_CACHE_SIZE,
+    config.LOCALE_CACHE_TTL,
+    config.LOCALE_CACHE_REDIS_TTL,
+)
+# Access levels changed from admin are picked up after ttl
+access_level_cache = TTLCache(config.ACCESS_LEVEL_CACHE_SIZE, config.ACCESS_LEVEL_CACHE_TTL)
+
+
+class CatalogCache:
+    """
+    Admin-edited data kept in memory of the process.
+
+    Every read compares local version of a catalog with the one in redis,
+    entries of an outdated catalog are dropped and loaded again.
+    """
+
+    def __init__(self):
+        self._catalogs = {}
+
+    async def version(self, catalog: str) -> int:
+        redis = await cache_redis.redis()
+        return int(await redis.get(CATALOG_VERSION_KEY.format(catalog)) or 0)
+
+    async def get_or_load(self, catalog: str, key: Hashable, loader: Callable[[], Awaitable]) -> Any:
+        """
+        Return cached entry of catalog, call loader if there is none
+        """
+        version = await self.version(catalog)
+        cached_version, entries = self._catalogs.get(catalog, (None, None))
+        if cached_version != version:
+            entries = {}
+            self._catalogs[catalog] = (version, entries)
+        if key not in entries:
+            entries[key] = await loader()
+        return entries[key]
+
+
+catalog_cache = CatalogCache()
+
+
+class KeyboardCache:
+    """
+    Serialized reply markups ready to be sent.
+
+    Key contains version of the catalog keyboard is built from, so keyboards
+    of outdated data are never returned and are evicted eventually.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.memory = TTLCache(maxsize, ttl)
+
+    async def get_or_build(
+            self,
+            kind: str,
+            entity_id: Hashable,
+            locale: Optional[str],
+            build: Callable[[], Awaitable],
+            catalog: str = None,
+    ) -> str:
+        """
+        Return markup json, call build to get the markup if there is none
+        """
+        version = await catalog_cache.version(catalog) if catalog else None
+        key = (kind, entity_id, locale, version)
+        markup = self.memory.get(key)
+        if markup is None:
+            markup = (await build()).as_json()
+            self.memory.set(key, markup)
+        return markup
+
+
+keyboard_cache = KeyboardCache(config.KEYBOARD_CACHE_SIZE, config.KEYBOARD_CACHE_TTL)
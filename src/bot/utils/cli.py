@@ -59,12 +59,16 @@ def polling(skip_updates: bool):
 
 
 @cli.command()
+@click.option("--workers", type=int, default=1, help="Amount of worker processes")
 @auto_reload_mixin
-def webhook():
+def webhook(workers: int):
     """
     Run application in webhook mode
     """
     from bot.utils.executor import runner
+    from bot.utils.workers import run_workers
     from bot import config
 
+    if workers > 1:
+        return run_workers(workers)
     runner.start_webhook(webhook_path=config.WEBHOOK_PATH, port=config.BOT_PUBLIC_PORT)
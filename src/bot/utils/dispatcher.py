@@ -0,0 +1,95 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from aiogram import Dispatcher, types
+from aiogram.dispatcher.handler import Handler
+
+# Chat whose update is processed in the current task
+current_chat: ContextVar[Optional[int]] = ContextVar('current_chat', default=None)
+
+CHAT_EVENTS = ('message', 'edited_message', 'channel_post', 'edited_channel_post')
+
+
+def update_chat_id(update: types.Update) -> Optional[int]:
+    """
+    Chat of the update or user who sent it if update is not bound to chat
+    """
+    for key in CHAT_EVENTS:
+        event = getattr(update, key)
+        if event:
+            return event.chat.id
+    for event in update.values.values():
+        user = getattr(event, 'from_user', None) or getattr(event, 'user', None)
+        if user:
+            return user.id
+
+
+class ChatLane:
+    """
+    Serial queue of a chat. Lock of asyncio wakes waiters in FIFO order,
+    so updates are processed in the order they arrived
+    """
+    __slots__ = ('lock', 'pending')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class OrderedHandler(Handler):
+    """
+    Handler of updates processing updates of one chat one after another
+    and no more than `concurrency` updates at once
+    """
+
+    def __init__(self, dispatcher, concurrency: int, **kwargs):
+        super().__init__(dispatcher, **kwargs)
+        self.concurrency = concurrency
+        self._semaphore = None
+        self.lanes: Dict[int, ChatLane] = {}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily to bind to the loop the dispatcher runs in
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def notify(self, *args):
+        chat_id = update_chat_id(args[0])
+        if chat_id is None or current_chat.get() == chat_id:
+            # Update is processed from inside of an update of the same chat
+            return await super().notify(*args)
+
+        lane = self.lanes.get(chat_id)
+        if lane is None:
+            lane = self.lanes[chat_id] = ChatLane()
+        lane.pending += 1
+        try:
+            async with lane.lock, self.semaphore:
+                token = current_chat.set(chat_id)
+                try:
+                    return await super().notify(*args)
+                finally:
+                    current_chat.reset(token)
+        finally:
+            lane.pending -= 1
+            if not lane.pending:
+                # Evict idle lane
+                del self.lanes[chat_id]
+
+
+class OrderedDispatcher(Dispatcher):
+    """
+    Dispatcher keeping order of updates of a chat.
+
+    Handlers do read-modify-write of FSM data, concurrent updates of one chat
+    would overwrite changes of each other. Updates of different chats are still
+    processed concurrently.
+    """
+
+    def __init__(self, *args, concurrency: int = 100, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updates_handler = OrderedHandler(self, concurrency, middleware_key='update')
+        self.updates_handler.register(self.process_update)
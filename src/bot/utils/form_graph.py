@@ -0,0 +1,176 @@
+"""
+Forms compiled to immutable graphs of questions and answers.
+
+A graph is loaded once per version of forms catalog, after that navigation
+through a quiz does not touch the database.
+"""
+import bisect
+from collections import Counter
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from bot import config
+from bot.db.config import SessionLocal
+from bot.db.schemas import FormTable, FormQuestionTable, FormAnswerTable
+from bot.utils.cache import catalog_cache
+
+
+@dataclass(frozen=True)
+class Answer:
+    id: int
+    question_id: int
+    text: str
+    is_correct: bool
+    jump_to_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class Question:
+    id: int
+    form_id: int
+    text: str
+    image: Optional[str]
+    position: int
+    multi_answer: bool
+    custom_answer: bool
+    custom_answer_text: Optional[str]
+    accept_file: bool
+    chat_id: Optional[str]
+    one_row_btns: bool
+    answers: Tuple[Answer, ...]
+
+
+@dataclass(frozen=True)
+class ScoreRange:
+    low: int
+    high: int
+    message: str
+
+
+@dataclass(frozen=True)
+class FormGraph:
+    id: int
+    name: str
+    # Ordered by position and id like FormTable.questions
+    questions: Tuple[Question, ...]
+    end_messages: Tuple[ScoreRange, ...]
+    question_by_id: Mapping[int, Question] = field(repr=False)
+    answer_by_id: Mapping[int, Answer] = field(repr=False)
+    positions: Tuple[int, ...] = field(repr=False)
+
+    @property
+    def form_link(self):
+        return f'{config.DOMAIN}/admin/forms/form/{self.id}/change/'
+
+    def question(self, question_id: int) -> Optional[Question]:
+        return self.question_by_id.get(question_id)
+
+    def answer(self, answer_id: int) -> Optional[Answer]:
+        return self.answer_by_id.get(answer_id)
+
+    def next_question(self, position: int) -> Optional[Question]:
+        """
+        First question with position greater than the passed one
+        """
+        index = bisect.bisect_right(self.positions, position)
+        return self.questions[index] if index < len(self.questions) else None
+
+    def end_message(self, percent_score: int) -> Optional[str]:
+        """
+        Message of the last range containing score
+        """
+        message = None
+        for score_range in self.end_messages:
+            if score_range.low <= percent_score <= score_range.high:
+                message = score_range.message
+        return message
+
+    def answer_counts(self, answers: Optional[dict]) -> Counter:
+        """
+        Answer options chosen in answers of a contact. Keys are (question_id, answer_id),
+        custom answers are not counted
+        """
+        counts = Counter()
+        for question_id, chosen in (answers or {}).items():
+            question = self.question(int(question_id))
+            if question is None:
+                continue
+            chosen = chosen if isinstance(chosen, list) else [chosen]
+            for answer in question.answers:
+                if answer.text in chosen:
+                    counts[(question.id, answer.id)] += 1
+        return counts
+
+
+def compile_form(form: FormTable) -> FormGraph:
+    questions = tuple(
+        Question(
+            id=question.id,
+            form_id=question.form_id,
+            text=question.text,
+            image=question.image,
+            position=question.position,
+            multi_answer=question.multi_answer,
+            custom_answer=question.custom_answer,
+            custom_answer_text=question.custom_answer_text,
+            accept_file=question.accept_file,
+            chat_id=question.chat_id,
+            one_row_btns=question.one_row_btns,
+            answers=tuple(
+                Answer(
+                    id=answer.id,
+                    question_id=answer.question_id,
+                    text=answer.text,
+                    is_correct=answer.is_correct,
+                    jump_to_id=answer.jump_to_id,
+                ) for answer in question.answers
+            ),
+        ) for question in form.questions
+    )
+    end_messages = []
+    for key, message in (form.end_message or {}).items():
+        low, high = map(int, key.split('-'))
+        end_messages.append(ScoreRange(low, high, message))
+
+    return FormGraph(
+        id=form.id,
+        name=form.name,
+        questions=questions,
+        end_messages=tuple(end_messages),
+        question_by_id=MappingProxyType({question.id: question for question in questions}),
+        answer_by_id=MappingProxyType({
+            answer.id: answer for question in questions for answer in question.answers
+        }),
+        positions=tuple(question.position for question in questions),
+    )
+
+
+async def get_form_graph(form_id: int) -> Optional[FormGraph]:
+    async def load():
+        async with SessionLocal() as session:
+            form = (await session.execute(
+                select(FormTable).where(FormTable.id == form_id)
+                .options(selectinload(FormTable.questions).selectinload(FormQuestionTable.answers))
+            )).scalar()
+        return compile_form(form) if form else None
+
+    return await catalog_cache.get_or_load('forms', ('graph', form_id), load)
+
+
+async def get_answer_form_id(answer_id: int) -> Optional[int]:
+    """
+    Form of the answer, used to find graph of a pressed answer button
+    """
+    async def load():
+        async with SessionLocal() as session:
+            return (await session.execute(
+                select(FormQuestionTable.form_id)
+                .join(FormAnswerTable, FormAnswerTable.question_id == FormQuestionTable.id)
+                .where(FormAnswerTable.id == answer_id)
+            )).scalar()
+
+    return await catalog_cache.get_or_load('forms', ('answer_form', answer_id), load)
@@ -0,0 +1,69 @@
+import functools
+from contextvars import ContextVar
+from typing import List, Optional
+
+from loguru import logger
+from sqlalchemy import event
+
+from bot import config
+from bot.db.config import engine
+
+# Statements executed inside of the innermost query_budget block of the current task.
+# SQLAlchemy runs queries in greenlets with a copy of the task context, so list is shared
+_statements: ContextVar[Optional[List[str]]] = ContextVar('query_budget_statements', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@event.listens_for(engine.sync_engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements = _statements.get()
+    if statements is not None:
+        statements.append(statement)
+
+
+class query_budget:
+    """
+    Limit amount of SQL queries of a block or a coroutine, e.g. of a handler:
+
+        @dp.message_handler(...)
+        @query_budget(2)
+        @create_session
+        async def handler(message, session): ...
+
+    Exceeding the budget raises QueryBudgetExceeded if strict, otherwise it is logged.
+    Strict mode is enabled by QUERY_BUDGET_STRICT, tests should run with it.
+    """
+
+    def __init__(self, limit: int, strict: bool = None):
+        self.limit = limit
+        self.strict = config.QUERY_BUDGET_STRICT if strict is None else strict
+        self.statements = []
+        self._token = None
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    async def __aenter__(self):
+        self.statements = []
+        self._token = _statements.set(self.statements)
+        return self
+
+    async def __aexit__(self, type_, value, traceback):
+        _statements.reset(self._token)
+        if type_ is None and self.count > self.limit:
+            message = f'{self.count} queries executed, budget is {self.limit}:\n' + '\n'.join(self.statements)
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        async def inner(*args, **kwargs):
+            async with query_budget(self.limit, self.strict):
+                return await func(*args, **kwargs)
+
+        return inner
@@ -0,0 +1,97 @@
+import hashlib
+import json
+from typing import Tuple
+
+from aioredis import ReplyError
+
+from bot import config
+from bot.utils.cache import cache_redis
+
+# Select answer of a multi-answer question or unselect it if it was selected.
+# Amount of selected incorrect answers is counted to tell if question is answered correctly.
+# Returns amount of selected answers
+TOGGLE_SCRIPT = """
+local field = 'answer:' .. ARGV[1]
+local raw = redis.call('HGET', KEYS[1], field)
+local answers = raw and cjson.decode(raw) or {}
+local delta = 1
+for i, answer in ipairs(answers) do
+    if answer == ARGV[2] then
+        table.remove(answers, i)
+        delta = -1
+        break
+    end
+end
+if delta == 1 then
+    table.insert(answers, ARGV[2])
+end
+
+if #answers == 0 then
+    redis.call('HDEL', KEYS[1], field)
+else
+    redis.call('HSET', KEYS[1], field, cjson.encode(answers))
+end
+if ARGV[3] == '0' then
+    redis.call('HINCRBY', KEYS[1], 'incorrect:' .. ARGV[1], delta)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return #answers
+"""
+TOGGLE_SHA = hashlib.sha1(TOGGLE_SCRIPT.encode()).hexdigest()
+
+
+class QuizState:
+    """
+    Answers and score of a contact passing a form.
+
+    Kept in a redis hash instead of FSM data, so every answer is written
+    by a single command without rewriting the whole data of the quiz.
+    """
+
+    def __init__(self, chat_id: int, form_id: int):
+        self.key = f'quiz:{chat_id}:{form_id}'
+
+    async def reset(self) -> None:
+        redis = await cache_redis.redis()
+        await redis.delete(self.key)
+
+    async def set_answer(self, question_id: int, answer: str) -> None:
+        redis = await cache_redis.redis()
+        tr = redis.multi_exec()
+        tr.hset(self.key, f'answer:{question_id}', json.dumps(answer))
+        tr.expire(self.key, config.QUIZ_STATE_TTL)
+        await tr.execute()
+
+    async def toggle_answer(self, question_id: int, answer: str, is_correct: bool) -> int:
+        redis = await cache_redis.redis()
+        keys = [self.key]
+        args = [question_id, answer, int(bool(is_correct)), config.QUIZ_STATE_TTL]
+        try:
+            return await redis.evalsha(TOGGLE_SHA, keys=keys, args=args)
+        except ReplyError as e:
+            if 'NOSCRIPT' not in str(e):
+                raise
+            return await redis.eval(TOGGLE_SCRIPT, keys=keys, args=args)
+
+    async def add_score(self, points: int = 1) -> None:
+        redis = await cache_redis.redis()
+        await redis.hincrby(self.key, 'score', points)
+
+    async def is_correct(self, question_id: int) -> bool:
+        """
+        Whether no incorrect answers of multi-answer question are selected
+        """
+        redis = await cache_redis.redis()
+        return not int(await redis.hget(self.key, f'incorrect:{question_id}') or 0)
+
+    async def load(self) -> Tuple[dict, int]:
+        """
+        Return answers by question id and score
+        """
+        redis = await cache_redis.redis()
+        state = await redis.hgetall(self.key, encoding='utf8')
+        answers = {
+            field.split(':', 1)[1]: json.loads(value)
+            for field, value in state.items() if field.startswith('answer:')
+        }
+        return answers, int(state.get('score', 0))
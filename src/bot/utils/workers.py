@@ -0,0 +1,170 @@
+"""
+Webhook server running in several processes.
+
+Every worker listens on the same port with SO_REUSEPORT, so the kernel spreads
+connections of telegram between them. A received update is pushed to the redis
+list of the worker owning its chat (chat_id % workers) and the owner processes
+it. Inside of a worker OrderedDispatcher handles updates of one chat one at a
+time, so updates of one chat never race for FSM state.
+
+An update is moved to the processing list of the shard while it is processed.
+Updates left there by a crashed worker are processed again when it is restarted.
+"""
+import asyncio
+import json
+import multiprocessing
+import signal
+from multiprocessing.connection import wait
+from aiogram import Bot, Dispatcher, types
+from aiohttp import web
+from loguru import logger
+
+from bot import config
+from bot.misc import dp
+from bot.utils.cache import cache_redis
+from bot.utils.dispatcher import CHAT_EVENTS
+from bot.utils.executor import on_startup_webhook, on_shutdown as on_shutdown_executor
+
+UPDATES_KEY = 'bot:updates:{}'
+PROCESSING_KEY = 'bot:processing:{}'
+
+
+def raw_chat_id(update: dict) -> int:
+    """
+    Same as dispatcher.update_chat_id, but for update json not parsed yet
+    """
+    for key in CHAT_EVENTS:
+        if key in update:
+            return update[key]['chat']['id']
+    for value in update.values():
+        if isinstance(value, dict) and 'from' in value:
+            return value['from']['id']
+    return update.get('update_id', 0)
+
+
+async def process_update(shard: int, raw: bytes, pending: asyncio.Semaphore):
+    update = json.loads(raw)
+    try:
+        await dp.updates_handler.notify(types.Update.to_object(update))
+    except Exception:
+        logger.exception(f'Update {update.get("update_id")} failed')
+    finally:
+        pending.release()
+        redis = await cache_redis.redis()
+        await redis.lrem(PROCESSING_KEY.format(shard), 1, raw)
+
+
+async def requeue_processing(shard: int):
+    """
+    Return updates interrupted by the previous worker of the shard to the head of its queue
+    """
+    redis = await cache_redis.redis()
+    # Processing list is filled from the left, so the oldest update is the last one
+    interrupted = await redis.lrange(PROCESSING_KEY.format(shard), 0, -1)
+    if not interrupted:
+        return
+    transaction = redis.multi_exec()
+    transaction.rpush(UPDATES_KEY.format(shard), *interrupted)
+    transaction.delete(PROCESSING_KEY.format(shard))
+    await transaction.execute()
+    logger.warning(f'{len(interrupted)} interrupted updates of shard {shard} are processed again')
+
+
+async def consume(shard: int, tasks: set):
+    """
+    Process updates of the shard in the order they were received
+    """
+    redis = await cache_redis.redis()
+    await requeue_processing(shard)
+    # Updates left in redis while the worker is busy
+    pending = asyncio.Semaphore(config.BOT_CONCURRENCY * 2)
+    while True:
+        await pending.acquire()
+        # Queue is filled from the left and consumed from the right
+        raw = await redis.brpoplpush(UPDATES_KEY.format(shard), PROCESSING_KEY.format(shard), timeout=0)
+        task = asyncio.create_task(process_update(shard, raw, pending))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+
+def create_app(index: int, workers: int) -> web.Application:
+    async def receive(request: web.Request):
+        update = await request.json()
+        shard = raw_chat_id(update) % workers
+        redis = await cache_redis.redis()
+        await redis.lpush(UPDATES_KEY.format(shard), json.dumps(update))
+        return web.Response()
+
+    async def on_startup(app: web.Application):
+        if index == 0:
+            await on_startup_webhook(dp)
+        app['tasks'] = set()
+        app['consumer'] = asyncio.create_task(consume(index, app['tasks']))
+
+    async def on_shutdown(app: web.Application):
+        app['consumer'].cancel()
+        await asyncio.gather(app['consumer'], return_exceptions=True)
+        # Updates taken from the queue are finished, the rest waits for the next worker
+        await asyncio.gather(*app['tasks'], return_exceptions=True)
+        await dp.storage.close()
+        await dp.storage.wait_closed()
+        await cache_redis.close()
+        await cache_redis.wait_closed()
+        await (await dp.bot.get_session()).close()
+        await on_shutdown_executor(dp)
+
+    app = web.Application()
+    app.router.add_post(config.WEBHOOK_PATH, receive)
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+    return app
+
+
+def run_worker(index: int, workers: int):
+    # Pools of engine, redis and bot are created lazily, so a forked worker opens its own
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    Bot.set_current(dp.bot)
+    Dispatcher.set_current(dp)
+    logger.info(f'Worker {index} started')
+    web.run_app(
+        create_app(index, workers),
+        port=config.BOT_PUBLIC_PORT,
+        reuse_port=True,
+        print=None,
+    )
+
+
+def run_workers(workers: int):
+    """
+    Fork workers and restart them if they die until terminated
+    """
+    context = multiprocessing.get_context('fork')
+    processes = {}
+    stopping = False
+
+    def spawn(index):
+        process = context.Process(target=run_worker, args=(index, workers), name=f'bot-worker-{index}')
+        process.start()
+        processes[index] = process
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            process.terminate()
+
+    for index in range(workers):
+        spawn(index)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while processes:
+        wait([process.sentinel for process in processes.values()])
+        for index, process in list(processes.items()):
+            if process.is_alive():
+                continue
+            del processes[index]
+            if not stopping:
+                logger.warning(f'Worker {index} exited with code {process.exitcode}, restarting')
+                spawn(index)
@@ -2,6 +2,8 @@ import datetime
 
 from django.contrib import admin
 from django.db.models import F
+from django.urls import reverse
+from django.utils.html import format_html
 
 from broadcast import models
 
@@ -34,7 +36,7 @@ class Recipients(admin.TabularInline):
 
 @admin.register(models.Message)
 class HistoryAdmin(admin.ModelAdmin):
-    list_display = ('id', 'text', 'recipients_count')
+    list_display = ('id', 'text', 'recipients_count', 'progress_link')
     readonly_fields = ('recipients_count',)
     list_per_page = 10
     inlines = (Recipients,)
@@ -44,8 +46,25 @@ class HistoryAdmin(admin.ModelAdmin):
     def recipients_count(self, instance):
         return instance.messagehistory_set.count()
 
+    @admin.display(description='Ход рассылки')
+    def progress_link(self, instance):
+        return format_html('<a href="{}">Открыть</a>', reverse('broadcast:progress', args=(instance.id,)))
+
     def has_add_permission(self, request, obj=None):
         return False
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(models.Audience)
+class AudienceAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'course', 'blocked_bot', 'send_link')
+    list_display_links = ('name',)
+    list_select_related = ('course',)
+    list_per_page = 20
+
+    @admin.display(description='Рассылка')
+    def send_link(self, audience):
+        url = reverse('broadcast:prepare_message')
+        return format_html('<a href="{}?audience={}">Отправить сообщение</a>', url, audience.id)
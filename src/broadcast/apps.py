@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BroadcastConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'broadcast'
+
+    def ready(self):
+        # noinspection PyUnresolvedReferences
+        from . import signals
@@ -3,7 +3,10 @@ from broadcast import models
 
 
 class BroadcastForm(forms.ModelForm):
-    _selected_action = forms.CharField(widget=forms.MultipleHiddenInput)
+    # Either ids of selected contacts or an audience
+    _selected_action = forms.CharField(widget=forms.MultipleHiddenInput, required=False)
+    # Query string selecting the audience, see views.get_audience
+    audience_query = forms.CharField(widget=forms.HiddenInput, required=False)
     is_feedback = forms.BooleanField(required=False, label='Фидбек')
 
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('broadcast', '0006_message_notes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='video_duration',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='video_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='video_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
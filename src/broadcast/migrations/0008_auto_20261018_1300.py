@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 13:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_auto_20211227_1457'),
+        ('broadcast', '0007_auto_20261018_1200'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Audience',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True, verbose_name='Дата обновления')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('status', models.CharField(choices=[('all', 'Все'), ('contact', 'ТГ'), ('lead', 'Лид'), ('client', 'Клиент')], default='all', max_length=20, verbose_name='Статус')),
+                ('blocked_bot', models.BooleanField(blank=True, default=False, help_text='Пусто - не учитывать', null=True, verbose_name='Блокнул бота')),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='courses.course', verbose_name='Курс')),
+            ],
+            options={
+                'verbose_name': 'Аудитория',
+                'verbose_name_plural': 'Аудитории',
+            },
+        ),
+    ]
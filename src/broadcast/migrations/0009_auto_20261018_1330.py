@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 13:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('broadcast', '0008_auto_20261018_1300'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audience',
+            name='message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='broadcast.message', verbose_name='Получатели сообщения'),
+        ),
+        migrations.AddField(
+            model_name='audience',
+            name='undelivered',
+            field=models.BooleanField(default=False, verbose_name='Только недоставленные'),
+        ),
+    ]
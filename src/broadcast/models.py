@@ -2,7 +2,9 @@ from django.core.validators import validate_image_file_extension
 from django.db import models
 
 from broadcast.utils.uploaders import message_media_directory
+from contacts.models import Contact
 from general.models import BaseModel
+from general.utils.ffmpeg import get_duration, get_resolution
 from general.validators import (
     validate_video_extension, validate_file_size,
     validate_dimensions, validate_thumbnail_size
@@ -31,9 +33,25 @@ class Message(BaseModel):
     delivery_end_time = models.DateTimeField('Окончание отправки', null=True, blank=True)
     notes = models.TextField(verbose_name='Заметки к сообщению', blank=True, null=True)
 
+    video_duration = models.PositiveIntegerField(editable=False, null=True, blank=True)
+    video_width = models.PositiveIntegerField(editable=False, null=True, blank=True)
+    video_height = models.PositiveIntegerField(editable=False, null=True, blank=True)
+
     def __str__(self):
         return f'MessageId{self.id}'
 
+    def set_video_meta(self):
+        """
+        Probe video once, so sending to every recipient does not spawn ffprobe
+        """
+        self.video_duration = get_duration(self.video.path)
+        self.video_width, self.video_height = get_resolution(self.video.path)
+        Message.objects.filter(pk=self.pk).update(
+            video_duration=self.video_duration,
+            video_width=self.video_width,
+            video_height=self.video_height,
+        )
+
     class Meta:
         verbose_name = 'Сообщение'
         verbose_name_plural = 'Сообщения'
@@ -51,3 +69,80 @@ class MessageHistory(BaseModel):
     class Meta:
         verbose_name_plural = 'Отправленное сообщение'
         verbose_name = 'Отправленные сообщения'
+
+
+class Audience(BaseModel):
+    """
+    Saved filter of recipients. Broadcast to an audience stores only its id,
+    recipients are selected when message is sent
+    """
+    class Status(models.TextChoices):
+        all = 'all', 'Все'
+        contact = 'contact', 'ТГ'
+        lead = 'lead', 'Лид'
+        client = 'client', 'Клиент'
+
+    name = models.CharField(max_length=100, verbose_name='Название')
+    status = models.CharField(max_length=20, verbose_name='Статус', choices=Status.choices, default=Status.all)
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, verbose_name='Курс',
+                               null=True, blank=True)
+    blocked_bot = models.BooleanField(verbose_name='Блокнул бота', null=True, blank=True, default=False,
+                                      help_text='Пусто - не учитывать')
+    message = models.ForeignKey('broadcast.Message', on_delete=models.CASCADE, verbose_name='Получатели сообщения',
+                                null=True, blank=True)
+    undelivered = models.BooleanField(verbose_name='Только недоставленные', default=False)
+
+    def __str__(self):
+        return self.name
+
+    # Built-in audiences are not saved until a message is sent to them
+    @classmethod
+    def everyone(cls):
+        return cls(name='Все')
+
+    @classmethod
+    def for_course(cls, course):
+        return cls(name=f'Курс: {course}', course=course)
+
+    @classmethod
+    def for_message(cls, message, undelivered=False):
+        return cls(name=f'{"Не получили" if undelivered else "Получатели"}: {message}',
+                   message=message, undelivered=undelivered)
+
+    def get_or_save(self):
+        """
+        Saved audience with the same filter as this one
+        """
+        if self.pk:
+            return self
+        # Admin may save several audiences with the same filter, any of them is fine
+        audience = Audience.objects.filter(
+            status=self.status, course=self.course, blocked_bot=self.blocked_bot,
+            message=self.message, undelivered=self.undelivered).order_by('id').first()
+        if audience is None:
+            self.save()
+            audience = self
+        return audience
+
+    def get_contacts(self):
+        contacts = Contact.objects.all()
+        if self.status == self.Status.contact:
+            contacts = contacts.filter(student__isnull=True)
+        elif self.status == self.Status.lead:
+            contacts = contacts.filter(student__isnull=False, student__is_client=False)
+        elif self.status == self.Status.client:
+            contacts = contacts.filter(student__isnull=False, student__is_client=True)
+        if self.course_id:
+            contacts = contacts.filter(student__studentcourse__course_id=self.course_id)
+        if self.message_id:
+            history = MessageHistory.objects.filter(message_id=self.message_id)
+            if self.undelivered:
+                history = history.filter(delivered=False)
+            contacts = contacts.filter(id__in=history.values('contact_id'))
+        if self.blocked_bot is not None:
+            contacts = contacts.filter(blocked_bot=self.blocked_bot)
+        return contacts
+
+    class Meta:
+        verbose_name = 'Аудитория'
+        verbose_name_plural = 'Аудитории'
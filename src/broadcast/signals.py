@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from broadcast.models import Message
+from general.utils.cache import invalidate_media
+
+
+@receiver(post_save, sender=Message)
+def message_video_meta(sender, instance, created, **kwargs):
+    """
+    Store duration and resolution of the video upon saving.
+    """
+    if instance.video and instance.video_duration is None:
+        instance.set_video_meta()
+
+
+@receiver(post_save, sender=Message)
+def message_invalidate_media(sender, instance, **kwargs):
+    """
+    Make bot upload media again if it was replaced
+    """
+    invalidate_media(instance.image, instance.video)
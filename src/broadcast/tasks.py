@@ -1,22 +1,24 @@
 import datetime
 import json
-import time
 
 from celery import shared_task, chord
+from django.conf import settings
+from django.utils import timezone
 from loguru import logger
 
 from broadcast import models
 from broadcast.models import MessageHistory
+from broadcast.utils.engine import engine
+from broadcast.utils.progress import BroadcastProgress
 from broadcast.utils.telegram import TelegramSender
 from contacts import models as contact_models
-from general.utils.ffmpeg import get_duration, get_resolution
 
 
-def set_blocked(chat_id):
+def set_blocked(chat_ids):
     """
-    Update student status if he has blocked the bot
+    Update students status if they have blocked the bot
     """
-    contact_models.Contact.objects.filter(tg_id=chat_id).update(blocked_bot=True)
+    contact_models.Contact.objects.filter(tg_id__in=chat_ids).update(blocked_bot=True)
 
 
 def feedback_keyboard(is_keyboard, cb_identifier, history_id):
@@ -63,8 +65,8 @@ def get_config(message, data):
     if message.video:
         video = message.video.path
         thumb = image
-        duration = get_duration(video)
-        width, height = get_resolution(video)
+        duration = message.video_duration
+        width, height = message.video_width, message.video_height
         image = None
 
     return {
@@ -88,52 +90,105 @@ def save_msg(msg_id):
     msg = models.Message.objects.get(pk=msg_id)
     msg.delivery_end_time = datetime.datetime.now()
     msg.save()
+    BroadcastProgress(msg_id).finish()
 
 
-@shared_task
-def send_message(message_id, contact_id, ctx):
+def get_recipients(data):
     """
-    Send message and save status sending
+    Contacts of the audience or selected contacts
     """
-    message = models.Message.objects.get(pk=message_id)
-    message_history = MessageHistory(
-        message_id=message_id,
-        contact_id=contact_id,
-        delivered=False
-    )
-    message_history.save()  # Only to retrieve id of created object
-    ctx['history_id'] = message_history.pk
-    data = get_config(message, ctx)
-    resp = TelegramSender(**data).send()
+    if data.get('audience_id'):
+        return models.Audience.objects.get(pk=data['audience_id']).get_contacts()
+    return contact_models.Contact.objects.filter(pk__in=_listify(data['ids']), blocked_bot=False)
+
 
-    if resp.get('ok'):
-        message_history.delivered = True
+def recipient_chunks(contacts, size):
+    """
+    Split contacts into chunks of ids of `size` contacts. Keyset pagination
+    keeps every query cheap and only ids of a single chunk in memory
+    """
+    last_id = 0
+    while True:
+        ids = list(contacts.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:size])
+        if not ids:
+            break
+        yield ids
+        last_id = ids[-1]
 
-    if resp.get('ok') is False and resp.get('error_code') == 403:
-        set_blocked(data.get('chat_id'))
 
-    message_history.save()
-    logger.info(resp)
+@shared_task
+def send_message(message_id, ids, ctx):
+    """
+    Send message to contacts of the batch and save status sending.
+    Errors are not raised, otherwise chord never calls save_msg and broadcast is never finished
+    """
+    try:
+        send_batch(message_id, ids, ctx)
+    except Exception:
+        logger.exception(f'Batch of message {message_id} starting with contact {ids[0]} failed')
+
+
+def send_batch(message_id, ids, ctx):
+    # Recipients were counted as queued when the broadcast was split, so they are not filtered again
+    recipients = list(contact_models.Contact.objects.filter(pk__in=ids).order_by('id').values_list('id', 'tg_id'))
+    message = models.Message.objects.get(pk=message_id)
+    # History ids are needed for feedback keyboards, so rows are created before sending
+    histories = MessageHistory.objects.bulk_create([
+        MessageHistory(message_id=message_id, contact_id=contact_id, delivered=False)
+        for contact_id, _ in recipients
+    ])
+    configs = [get_config(message, {
+        **ctx,
+        'contact_id': contact_id,
+        'tg_id': tg_id,
+        'history_id': message_history.pk,
+    }) for (contact_id, tg_id), message_history in zip(recipients, histories)]
+
+    responses = engine.send_batch(configs, BroadcastProgress(message_id))
+
+    delivered = []
+    blocked = []
+    for message_history, config, resp in zip(histories, configs, responses):
+        if resp.get('ok'):
+            delivered.append(message_history.pk)
+
+        if resp.get('ok') is False and resp.get('error_code') == 403:
+            blocked.append(config.get('chat_id'))
+
+        logger.info(resp)
+
+    if delivered:
+        MessageHistory.objects.filter(pk__in=delivered).update(
+            delivered=True, updated_at=timezone.now()
+        )
+    if blocked:
+        set_blocked(blocked)
 
 
 @shared_task
 def send_to_queue(data):
     """
-    Prepare config for every intended recipient and send message
+    Split intended recipients into batches and send message
     """
     message = models.Message.objects.get(pk=data['message_id'])
-    contacts = contact_models.Contact.objects.filter(pk__in=_listify(data['ids']))
+    if message.video and message.video_duration is None:
+        message.set_video_meta()
+    if settings.BROADCAST_SERVICE_CHAT:
+        # Upload media once, so batches sent in parallel reuse its file_id
+        TelegramSender(**get_config(message, {
+            'is_feedback': False,
+            'contact_id': None,
+            'history_id': None,
+            'tg_id': settings.BROADCAST_SERVICE_CHAT,
+        })).warmup()
+    progress = BroadcastProgress(message.id)
+    progress.start()
+    # Every task carries ids of its own batch only
     tasks = []
-    for counter, contact in enumerate(contacts, start=1):
-        # https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
-        # Telegram imposes restriction on sending message to 30 users per sec
-        if counter % 25 == 0:
-            time.sleep(1)
-
-        if not contact.blocked_bot:
-            tasks.append(send_message.s(message.id, contact.id, {
-                'contact_id': contact.id,
-                'is_feedback': data['is_feedback'],
-                'tg_id': contact.tg_id,
-            }))
+    for ids in recipient_chunks(get_recipients(data), settings.BROADCAST_BATCH_SIZE):
+        progress.add_queued(len(ids))
+        tasks.append(send_message.s(message.id, ids, {
+            'is_feedback': data['is_feedback'],
+        }))
+    # Sending rate is controlled by TokenBucket inside the broadcast engine
     chord(tasks)(save_msg.si(message.id))
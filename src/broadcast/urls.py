@@ -8,4 +8,5 @@ urlpatterns = [
     path('prepare-msg/', views.render_send, name='prepare_message'),
     path('resend-msg/<int:msg_id>', views.resend_msg, name='resend_msg'),
     path('send/', views.send, name='send'),
+    path('progress/<int:msg_id>', views.progress, name='progress'),
 ]
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import sys
+from typing import List, Optional
+
+import aiohttp
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from loguru import logger
+
+from broadcast.utils.progress import BroadcastProgress, FLUSH_INTERVAL
+from broadcast.utils.telegram import AsyncTelegramSender
+from broadcast.utils.throttling import TokenBucket, retry_after
+from general.utils.helpers import run_sync
+
+# Times message is resent to a recipient after telegram responded with 429
+MAX_RETRIES = 3
+
+
+class BroadcastEngine:
+    """
+    Sends a batch of messages concurrently.
+
+    Every worker process keeps one event loop and one pooled aiohttp session,
+    so connections to api.telegram.org are reused between batches. Concurrency
+    comes from the loop, so engine runs in prefork or solo workers only, a process
+    sends one batch at a time.
+    """
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = concurrency or settings.BROADCAST_CONCURRENCY
+        self._pid = None
+        self._loop = None
+        self._session = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        # Celery forks workers after import, loop and session must not be inherited
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._loop = asyncio.new_event_loop()
+            self._session = None
+        return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=settings.BROADCAST_TIMEOUT),
+            )
+        return self._session
+
+    async def _send_one(
+            self,
+            semaphore: asyncio.Semaphore,
+            bucket: TokenBucket,
+            config: dict,
+            progress: Optional[BroadcastProgress],
+    ) -> dict:
+        async with semaphore:
+            try:
+                resp = await self._send_with_retries(bucket, config, progress)
+            except Exception as e:
+                # e.g. media file is missing, other recipients of the batch are still sent
+                logger.exception(f'Sending to {config["chat_id"]} failed')
+                resp = {'ok': False, 'description': repr(e)}
+
+        if resp.get('ok'):
+            await run_sync(bucket.record_sent)
+        if progress:
+            progress.record_response(resp)
+        return resp
+
+    async def _send_with_retries(
+            self,
+            bucket: TokenBucket,
+            config: dict,
+            progress: Optional[BroadcastProgress],
+    ) -> dict:
+        for _ in range(MAX_RETRIES + 1):
+            # TokenBucket works through blocking redis-py, its calls are run in executor
+            wait = await run_sync(bucket.reserve, config['chat_id'])
+            while wait:
+                await asyncio.sleep(wait)
+                wait = await run_sync(bucket.reserve, config['chat_id'])
+
+            try:
+                resp = await AsyncTelegramSender(self._get_session(), **config).send()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f'Sending to {config["chat_id"]} failed: {e!r}')
+                return {'ok': False, 'description': repr(e)}
+
+            wait = retry_after(resp)
+            if not wait:
+                break
+            if progress:
+                progress.record_rate_limited()
+            await run_sync(bucket.pause, wait)
+        return resp
+
+    async def _flush_progress(self, progress: BroadcastProgress):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await run_sync(progress.flush, progress.take())
+
+    async def _send_batch(self, configs: List[dict], progress: Optional[BroadcastProgress]) -> List[dict]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket()
+        flusher = asyncio.ensure_future(self._flush_progress(progress)) if progress else None
+        try:
+            return await asyncio.gather(*[
+                self._send_one(semaphore, bucket, config, progress) for config in configs
+            ])
+        finally:
+            if flusher:
+                flusher.cancel()
+                await asyncio.gather(flusher, return_exceptions=True)
+                await run_sync(progress.flush, progress.take())
+
+    def send_batch(self, configs: List[dict], progress: BroadcastProgress = None) -> List[dict]:
+        """
+        Send messages described by configs. Return telegram responses in the same order.
+        Responses are counted by progress of the broadcast if it is passed
+        """
+        if 'gevent' in sys.modules:
+            from gevent import monkey
+            if monkey.is_module_patched('socket'):
+                # Greenlets would share the loop and executor threads would block the hub
+                raise RuntimeError('Broadcast batches must be run by prefork or solo worker, see CELERY_TASK_ROUTES')
+        return self.loop.run_until_complete(self._send_batch(configs, progress))
+
+    def close(self):
+        if self._session and not self._session.closed and self._pid == os.getpid():
+            self._loop.run_until_complete(self._session.close())
+
+
+engine = BroadcastEngine()
+
+
+@worker_process_shutdown.connect
+def close_engine(**kwargs):
+    engine.close()
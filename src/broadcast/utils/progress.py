@@ -0,0 +1,123 @@
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+from general.utils.cache import redis_client as redis
+
+# Amount of seconds to average rate of sending over
+RATE_WINDOW = 10
+# Seconds between writes of counts of a sending batch to redis
+FLUSH_INTERVAL = 1
+
+
+class BroadcastProgress:
+    """
+    Live counters of a broadcast kept in redis.
+
+    Hash `broadcast:progress:{id}` holds amounts of queued, sent, failed, blocked
+    and rate limited (429) messages and counts of failures by error code. Messages
+    sent in every second are counted separately to calculate current rate.
+    """
+    prefix = 'broadcast:progress'
+    counters = ('queued', 'sent', 'failed', 'blocked', 'rate_limited')
+
+    def __init__(self, message_id: int):
+        self.message_id = message_id
+        self.key = f'{self.prefix}:{message_id}'
+        # Responses are counted in memory and written to redis by flush
+        self._counts = Counter()
+        self._sent_by_second = Counter()
+
+    def _second_key(self, second: int) -> str:
+        return f'{self.key}:sent:{second}'
+
+    def start(self) -> None:
+        pipe = redis.pipeline()
+        pipe.hsetnx(self.key, 'started_at', time.time())
+        pipe.expire(self.key, settings.BROADCAST_PROGRESS_TTL)
+        pipe.execute()
+
+    def add_queued(self, amount: int) -> None:
+        pipe = redis.pipeline()
+        pipe.hincrby(self.key, 'queued', amount)
+        pipe.expire(self.key, settings.BROADCAST_PROGRESS_TTL)
+        pipe.execute()
+
+    def record_rate_limited(self) -> None:
+        self._counts['rate_limited'] += 1
+
+    def record_response(self, response: dict) -> None:
+        """
+        Count final response of telegram to a message
+        """
+        if response.get('ok'):
+            self._counts['sent'] += 1
+            self._sent_by_second[int(time.time())] += 1
+        elif response.get('error_code') == 403:
+            self._counts['blocked'] += 1
+        else:
+            self._counts['failed'] += 1
+            self._counts[f'error:{response.get("error_code", "network")}'] += 1
+
+    def take(self) -> Tuple[Counter, Counter]:
+        """
+        Return counts recorded since the last call and reset them
+        """
+        counts = self._counts, self._sent_by_second
+        self._counts, self._sent_by_second = Counter(), Counter()
+        return counts
+
+    def flush(self, counts: Tuple[Counter, Counter] = None) -> None:
+        """
+        Write recorded counts to redis by a single pipeline
+        """
+        counts, sent_by_second = counts or self.take()
+        if not counts and not sent_by_second:
+            return
+        pipe = redis.pipeline()
+        for field, amount in counts.items():
+            pipe.hincrby(self.key, field, amount)
+        pipe.expire(self.key, settings.BROADCAST_PROGRESS_TTL)
+        for second, amount in sent_by_second.items():
+            pipe.incrby(self._second_key(second), amount)
+            pipe.expire(self._second_key(second), RATE_WINDOW * 2)
+        pipe.execute()
+
+    def finish(self) -> None:
+        pipe = redis.pipeline()
+        pipe.hset(self.key, 'finished_at', time.time())
+        pipe.expire(self.key, settings.BROADCAST_PROGRESS_TTL)
+        pipe.execute()
+
+    def rate(self) -> float:
+        """
+        Messages sent per second during the last RATE_WINDOW seconds
+        """
+        now = int(time.time())
+        keys = [self._second_key(second) for second in range(now - RATE_WINDOW, now)]
+        return sum(int(count) for count in redis.mget(keys) if count) / RATE_WINDOW
+
+    def snapshot(self) -> Optional[dict]:
+        """
+        Counters, errors by code, rate and seconds left. None if broadcast is unknown
+        """
+        state = {key.decode(): value.decode() for key, value in redis.hgetall(self.key).items()}
+        if not state:
+            return None
+
+        progress = {counter: int(state.get(counter, 0)) for counter in self.counters}
+        progress['errors'] = {
+            key.split(':', 1)[1]: int(value) for key, value in state.items() if key.startswith('error:')
+        }
+        progress['done'] = progress['sent'] + progress['failed'] + progress['blocked']
+        progress['left'] = max(progress['queued'] - progress['done'], 0)
+        progress['finished'] = 'finished_at' in state
+        progress['rate'] = self.rate()
+
+        started_at = float(state.get('started_at', time.time()))
+        finished_at = float(state.get('finished_at', time.time()))
+        progress['elapsed'] = int(finished_at - started_at)
+        progress['eta'] = int(progress['left'] / progress['rate']) if progress['rate'] else None
+        return progress
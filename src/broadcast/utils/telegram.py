@@ -1,16 +1,13 @@
-import hashlib
 import os
 from io import BufferedReader
 from typing import Dict, List, Any
+
+import aiohttp
 from django.conf import settings
-import redis
 import requests
 
-redis = redis.Redis(
-    host=os.getenv('REDIS_HOST'),
-    port=os.getenv('REDIS_PORT'),
-    db=settings.REDIS_CUSTOM_DATA
-)
+from general.utils.cache import redis_client, media_cache
+from general.utils.helpers import run_sync
 
 
 class Telegram:
@@ -52,7 +49,7 @@ class TelegramSender:
         self.height = height
         self.thumbnail = thumbnail
         self.markup = markup
-        self.base_url = f'https://api.telegram.org/bot{os.getenv("BOT_TOKEN")}/'
+        self.base_url = f'{settings.TELEGRAM_API_URL}/bot{os.getenv("BOT_TOKEN")}/'
         self.data = {
             'chat_id': self.chat_id,
             'parse_mode': 'HTML',
@@ -60,10 +57,9 @@ class TelegramSender:
         if markup:
             self.data['reply_markup'] = markup
 
-    def send_video(self):
+    def _video_payload(self):
         if self.photo:
             raise TypeError('Cannot send video and image together')
-        url = self.base_url + 'sendVideo'
         self.data['caption'] = self.text
         self.data['duration'] = self.duration
         self.data['width'] = self.width
@@ -76,12 +72,11 @@ class TelegramSender:
         else:
             files['video'] = self.video
 
-        return requests.post(url, files=files, data=self.data).json()
+        return 'sendVideo', files
 
-    def send_image(self):
+    def _image_payload(self):
         if self.video:
             raise TypeError('Cannot send video and image together')
-        url = self.base_url + 'sendPhoto'
         self.data['caption'] = self.text
         files = {}
         if type(self.photo) is not BufferedReader:
@@ -89,21 +84,35 @@ class TelegramSender:
         else:
             files['photo'] = self.photo
 
-        return requests.post(url, files=files, data=self.data).json()
+        return 'sendPhoto', files
 
-    def send_message(self):
-        url = self.base_url + 'sendMessage'
+    def _message_payload(self):
         self.data['text'] = self.text
-        return requests.post(url, data=self.data).json()
+        return 'sendMessage', {}
 
-    def _send(self):
+    def _post(self, method, files):
+        return requests.post(self.base_url + method, files=files, data=self.data).json()
+
+    def send_video(self):
+        return self._post(*self._video_payload())
+
+    def send_image(self):
+        return self._post(*self._image_payload())
+
+    def send_message(self):
+        return self._post(*self._message_payload())
+
+    def _payload(self):
         if self.photo:
-            resp = self.send_image()
+            payload = self._image_payload()
         elif self.video:
-            resp = self.send_video()
+            payload = self._video_payload()
         else:
-            resp = self.send_message()
-        return resp
+            payload = self._message_payload()
+        return payload
+
+    def _send(self):
+        return self._post(*self._payload())
 
     def set_media(self, attr, value):
         setattr(self, attr, value)
@@ -115,23 +124,34 @@ class TelegramSender:
         else:
             return response['result'][media_attr][-1]['file_id']
 
+    def _media_key(self):
+        media_attr = 'photo' if self.photo else 'video'
+        return media_cache.key(media_attr, getattr(self, media_attr))
+
     def _cache_media(self):
         media_attr = 'photo' if self.photo else 'video'
-        hashed_filepath = hashlib.md5(getattr(self, media_attr).encode()).hexdigest()
-        media_object = redis.get(hashed_filepath)
-        wait = False
+        key = self._media_key()
+        media_object = media_cache.get(key)
+        is_uploader = False
 
         if not media_object:
-            wait = True
+            is_uploader = media_cache.lock(key)
+            if not is_uploader:
+                media_object = media_cache.wait(key)
+
+        wait = not media_object
+        if wait:
             media_object = open(f'{getattr(self, media_attr)}', 'rb')
 
         self.set_media(media_attr, media_object)
 
-        resp = self._send()
-
-        if wait:
-            file_id = self._get_file_id(resp, media_attr)
-            redis.set(hashed_filepath, file_id)
+        try:
+            resp = self._send()
+            if wait and resp.get('ok'):
+                media_cache.set(key, self._get_file_id(resp, media_attr))
+        finally:
+            if is_uploader:
+                media_cache.unlock(key)
 
         return resp
 
@@ -141,3 +161,72 @@ class TelegramSender:
         else:
             resp = self._send()
         return resp
+
+    def warmup(self):
+        """
+        Upload media unless it is cached, so that recipients are only sent its file_id
+        """
+        if (self.photo or self.video) and not redis_client.exists(self._media_key()):
+            return self._cache_media()
+
+
+class AsyncTelegramSender(TelegramSender):
+    """
+    TelegramSender sending through shared aiohttp session instead of blocking requests
+    """
+    def __init__(self, session: aiohttp.ClientSession, **kwargs):
+        super().__init__(**kwargs)
+        self.session = session
+
+    async def _post(self, method, files):
+        form = aiohttp.FormData()
+        for key, value in self.data.items():
+            if value is not None:
+                form.add_field(key, str(value))
+        for key, file in files.items():
+            form.add_field(key, file, filename=os.path.basename(file.name))
+
+        try:
+            async with self.session.post(self.base_url + method, data=form) as resp:
+                return await resp.json()
+        finally:
+            for file in files.values():
+                file.close()
+
+    async def _send(self):
+        return await self._post(*self._payload())
+
+    async def _cache_media(self):
+        # media_cache works through blocking redis-py, its calls are run in executor
+        media_attr = 'photo' if self.photo else 'video'
+        key = await run_sync(self._media_key)
+        media_object = await run_sync(media_cache.get, key)
+        is_uploader = False
+
+        if not media_object:
+            is_uploader = await run_sync(media_cache.lock, key)
+            if not is_uploader:
+                media_object = await media_cache.await_upload(key)
+
+        wait = not media_object
+        if wait:
+            media_object = open(f'{getattr(self, media_attr)}', 'rb')
+
+        self.set_media(media_attr, media_object)
+
+        try:
+            resp = await self._send()
+            if wait and resp.get('ok'):
+                await run_sync(media_cache.set, key, self._get_file_id(resp, media_attr))
+        finally:
+            if is_uploader:
+                await run_sync(media_cache.unlock, key)
+
+        return resp
+
+    async def send(self):
+        if self.photo or self.video:
+            resp = await self._cache_media()
+        else:
+            resp = await self._send()
+        return resp
@@ -0,0 +1,116 @@
+import time
+
+from django.conf import settings
+
+from general.utils.cache import redis_client as redis
+
+# Shared between all celery workers, so every worker draws from the same budget.
+# Each bucket is a hash of {tokens, ts}. A bucket refills at `rate` tokens per second
+# and never holds more than `burst` tokens. Returns 0 when a token was taken from
+# every bucket, otherwise the amount of milliseconds to wait before the next try.
+RESERVE_SCRIPT = redis.register_script("""
+local now = tonumber(ARGV[1])
+local pause = redis.call('PTTL', KEYS[1])
+if pause > 0 then
+    return pause
+end
+
+local wait = 0
+local buckets = {}
+for i = 2, #KEYS do
+    local rate = tonumber(ARGV[i * 2 - 2])
+    local burst = tonumber(ARGV[i * 2 - 1])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) * 1000 / rate))
+    end
+    buckets[i] = {tokens, rate, burst}
+end
+
+if wait > 0 then
+    return wait
+end
+
+for i = 2, #KEYS do
+    local tokens, rate, burst = unpack(buckets[i])
+    redis.call('HSET', KEYS[i], 'tokens', tokens - 1, 'ts', now)
+    redis.call('PEXPIRE', KEYS[i], math.ceil(burst * 1000 / rate) + 1000)
+end
+return 0
+""")
+
+
+class TokenBucket:
+    """
+    Rate limiter for Telegram Bot API shared through redis.
+
+    https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+    Telegram allows ~30 messages per second overall and 1 message per second to a chat.
+    """
+    prefix = 'broadcast:bucket'
+    rate_window = 60
+
+    def __init__(self, global_rate: float = None, chat_rate: float = None):
+        self.global_rate = global_rate or settings.BROADCAST_GLOBAL_RATE
+        self.chat_rate = chat_rate or settings.BROADCAST_CHAT_RATE
+
+    @property
+    def pause_key(self):
+        return f'{self.prefix}:pause'
+
+    def reserve(self, chat_id) -> float:
+        """
+        Try to take a token for chat. Return seconds to wait, 0 if token was taken
+        """
+        keys = [self.pause_key, f'{self.prefix}:global', f'{self.prefix}:chat:{chat_id}']
+        args = [
+            int(time.time() * 1000),
+            self.global_rate, self.global_rate,
+            self.chat_rate, 1,
+        ]
+        return RESERVE_SCRIPT(keys=keys, args=args) / 1000
+
+    def acquire(self, chat_id) -> None:
+        """
+        Block until token for chat is available
+        """
+        wait = self.reserve(chat_id)
+        while wait:
+            time.sleep(wait)
+            wait = self.reserve(chat_id)
+
+    def pause(self, retry_after: float) -> None:
+        """
+        Stop all senders for retry_after seconds. Used when telegram responds with 429
+        """
+        redis.set(self.pause_key, 1, px=int(retry_after * 1000), nx=True)
+
+    def record_sent(self) -> None:
+        """
+        Count message in the per-second counter of achieved rate
+        """
+        key = f'{self.prefix}:sent:{int(time.time())}'
+        pipe = redis.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, self.rate_window)
+        pipe.execute()
+
+    def achieved_rate(self, window: int = 10) -> float:
+        """
+        Average amount of messages sent per second during the last window seconds
+        """
+        window = min(window, self.rate_window)
+        now = int(time.time())
+        keys = [f'{self.prefix}:sent:{second}' for second in range(now - window, now)]
+        return sum(int(count) for count in redis.mget(keys) if count) / window
+
+
+def retry_after(response: dict):
+    """
+    Return seconds to wait if telegram response is 429 Too Many Requests
+    """
+    if response.get('ok') is False and response.get('error_code') == 429:
+        return response.get('parameters', {}).get('retry_after', 1)
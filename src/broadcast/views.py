@@ -1,61 +1,127 @@
-from django.http import HttpResponseRedirect
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.http import HttpResponseRedirect, QueryDict
+from django.shortcuts import render, get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
 from broadcast import models
 from broadcast.forms import BroadcastForm
 from broadcast.tasks import send_to_queue
+from broadcast.utils.progress import BroadcastProgress
+from broadcast.utils.throttling import TokenBucket
 from contacts import models as contact_models
+from general.utils.cache import media_cache
+from courses import models as course_models
 
+# Recipients listed on a page of preview before sending
+PREVIEW_SIZE = 100
 
+
+def audience_context(request, contacts):
+    """
+    Count of recipients and a page of them for preview
+    """
+    referer = request.GET.get('referer') or request.META['HTTP_REFERER']
+    query = request.GET.copy()
+    query.pop('page', None)
+    query['referer'] = referer
+    page = Paginator(contacts.order_by('id'), PREVIEW_SIZE).get_page(request.GET.get('page'))
+    return {
+        'page': page,
+        'total': page.paginator.count,
+        'query': query.urlencode(),
+        'referer': referer,
+    }
+
+
+def get_audience(params: QueryDict):
+    """
+    Audience selected by parameters of request, None if contacts are selected by ids
+    """
+    if 'all' in params:
+        return models.Audience.everyone()
+    if 'course' in params:
+        return models.Audience.for_course(get_object_or_404(course_models.Course, pk=params['course']))
+    if 'message' in params:
+        message = get_object_or_404(models.Message, pk=params['message'])
+        return models.Audience.for_message(message, 'undelivered' in params)
+    if 'audience' in params:
+        return get_object_or_404(models.Audience, pk=params['audience'])
+
+
+@staff_member_required
 def resend_msg(request, msg_id):
     """
-    Renders sent message for resending
+    Renders sent message for resending to all or undelivered recipients of it
     """
-    message = models.Message.objects.get(pk=msg_id)
-    contacts = [x.contact for x in message.messagehistory_set.all()]
+    message = get_object_or_404(models.Message, pk=msg_id)
+    undelivered = 'undelivered' in request.GET
+    audience_query = QueryDict(mutable=True)
+    audience_query['message'] = message.id
+    if undelivered:
+        audience_query['undelivered'] = ''
+    audience = get_audience(audience_query)
     form = BroadcastForm(initial={
-        '_selected_action': [contact.id for contact in contacts],
+        'audience_query': audience_query.urlencode(),
         'text': message.text,
         'video': message.video,
         'image': message.image,
         'link': message.link,
         'notes': message.notes,
     })
+    history = message.messagehistory_set.aggregate(
+        delivered=Count('id', filter=Q(delivered=True)), undelivered=Count('id', filter=Q(delivered=False)))
     context = {
-        'entities': contacts,
         'form': form,
-        'referer': request.META['HTTP_REFERER'],
+        'audience': audience,
+        'message': message,
+        'undelivered': undelivered,
+        'history': history,
+        **audience_context(request, audience.get_contacts()),
     }
     return render(request, "broadcast/send.html", context=context)
 
 
+@staff_member_required
 def render_send(request):
     """
-    Render send template for specific contact
+    Render send template for specific contacts or audience
     """
     selected = request.GET.getlist('_selected_action')
+    audience = get_audience(request.GET)
 
-    if 'all' in request.GET:
-        contacts = contact_models.Contact.objects.all()
+    if audience:
+        contacts = audience.get_contacts()
+        audience_query = request.GET.copy()
+        for key in ('page', 'referer'):
+            audience_query.pop(key, None)
+        form = BroadcastForm(initial={'audience_query': audience_query.urlencode()})
     else:
         contacts = contact_models.Contact.objects.filter(pk__in=selected)
+        form = BroadcastForm(initial={'_selected_action': selected})
 
-    form = BroadcastForm(initial={'_selected_action': [x.id for x in contacts]})
     context = {
-        'entities': contacts,
+        'audience': audience,
         'form': form,
-        'referer': request.META['HTTP_REFERER'],
+        **audience_context(request, contacts),
     }
 
     return render(request, 'broadcast/send.html', context=context)
 
 
+@staff_member_required
+@require_POST
 def send(request):
     """
     Handles POST Requests.
     Save submitted message and pass to celery for sending
     """
+    audience = get_audience(QueryDict(request.POST.get('audience_query', '')))
+    if audience:
+        audience = audience.get_or_save()
     message = models.Message.objects.create(
         text=request.POST.get('text'),
         video=request.FILES.get('video'),
@@ -68,6 +134,7 @@ def send(request):
     is_feedback = request.POST.get('is_feedback')
     config = {
         'ids': selected,
+        'audience_id': audience.id if audience else None,
         'message_id': message.id,
         'is_feedback': is_feedback,
     }
@@ -75,3 +142,19 @@ def send(request):
     send_to_queue.delay(config)
 
     return HttpResponseRedirect(request.POST.get('referer'))
+
+
+@staff_member_required
+def progress(request, msg_id):
+    """
+    Live progress of a broadcast read from redis counters
+    """
+    message = get_object_or_404(models.Message, pk=msg_id)
+    context = {
+        'message': message,
+        'progress': BroadcastProgress(message.id).snapshot(),
+        'global_rate': TokenBucket().achieved_rate(),
+        'media_stats': media_cache.stats(),
+        'refresh': settings.BROADCAST_PROGRESS_REFRESH,
+    }
+    return render(request, 'broadcast/admin/progress.html', context=context)
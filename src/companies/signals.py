@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from companies.models import Company
+from general.utils.cache import bump_catalog_version
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def companies_catalog_changed(sender, **kwargs):
+    """
+    Make bot reload learning centres
+    """
+    bump_catalog_version('companies')
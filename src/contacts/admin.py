@@ -13,6 +13,7 @@ class ContactAdmin(admin.ModelAdmin):
     list_display = ('id', 'profile_link', 'tg_id', 'created_at', 'updated_at')
     list_display_links = ('profile_link',)
     list_per_page = 20
+    list_select_related = ('student',)
     list_filter = (StatusFilter, 'blocked_bot')
     actions = ('send_message',)
     readonly_fields = ('data', 'is_registered', 'blocked_bot', 'profile_link',)
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from contacts.models import Contact
+from general.utils.cache import invalidate_locale
+
+
+@receiver(post_save, sender=Contact)
+@receiver(post_delete, sender=Contact)
+def contact_changed(sender, instance, **kwargs):
+    """
+    Drop locale of contact cached by bot, it may be changed from admin
+    """
+    if instance.tg_id:
+        invalidate_locale(instance.tg_id)
@@ -24,11 +24,15 @@ class LessonMedia(admin.TabularInline):
     fields = ('video', 'watch_count',)
     readonly_fields = ('watch_count',)
 
+    def get_queryset(self, request):
+        qs = super(LessonMedia, self).get_queryset(request)
+        return qs.annotate(
+            num_watched=Count('studentlesson', filter=Q(studentlesson__date_watched__isnull=False))
+        )
+
     @admin.display(description='Просмотров')
     def watch_count(self, instance):
-        count = models.StudentLesson.objects.filter(lesson=instance,
-                                                    date_watched__isnull=False).count()
-        return count
+        return instance.num_watched
 
     def has_add_permission(self, request, course):
         return False
@@ -48,6 +52,10 @@ class StudentCourseList(admin.TabularInline):
     def has_add_permission(self, request, course):
         return False
 
+    def get_queryset(self, request):
+        qs = super(StudentCourseList, self).get_queryset(request)
+        return qs.select_related('student__contact', 'course')
+
     @admin.display(description='Студент')
     def student_display(self, instance):
         return format_html(
@@ -119,6 +127,7 @@ class CourseAdmin(admin.ModelAdmin):
     list_per_page = 20
     search_fields = ('id', 'name')
     list_filter = ('company',)
+    list_select_related = ('company',)
     inlines = (LessonList, StudentCourseList, )
     ordering = ('id',)
     date_hierarchy = 'created_at'
@@ -130,8 +139,9 @@ class CourseAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super(CourseAdmin, self).get_queryset(request)
         qs = qs.annotate(
-            student_total=Count('student'),
-            num_finished=Count('studentcourse', filter=Q(studentcourse__has_finished=True))
+            # Both counts join enrolments, distinct keeps joins from multiplying each other
+            student_total=Count('student', distinct=True),
+            num_finished=Count('studentcourse', filter=Q(studentcourse__has_finished=True), distinct=True)
         )
         return qs
 
@@ -166,11 +176,11 @@ class CourseAdmin(admin.ModelAdmin):
 
     @admin.display(description='Количество студентов',ordering='student_total')
     def student_count(self, course):
-        return course.student_set.count()
+        return course.student_total
 
     @admin.display(description='Количество завершивших', ordering='num_finished')
     def finished_count(self, course):
-        return course.studentcourse_set.filter(has_finished=True).count()
+        return course.num_finished
 
 
 @admin.register(models.CourseMedia)
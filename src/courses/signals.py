@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from courses.models import Lesson, Course, CourseCategory, LessonCategory
+from general.utils.cache import invalidate_media, bump_catalog_version
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_invalidate_media(sender, instance, **kwargs):
+    """
+    Make bot upload media again if it was replaced
+    """
+    invalidate_media(instance.image, instance.video)
+
+
+@receiver(post_save, sender=CourseCategory)
+@receiver(post_delete, sender=CourseCategory)
+@receiver(post_save, sender=LessonCategory)
+@receiver(post_delete, sender=LessonCategory)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def courses_catalog_changed(sender, **kwargs):
+    """
+    Make bot reload courses
+    """
+    bump_catalog_version('courses')
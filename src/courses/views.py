@@ -6,6 +6,7 @@ from django.http import HttpResponseNotFound
 from django.shortcuts import render, redirect
 
 from courses import models
+from general.utils.cache import bump_catalog_version
 
 TELEGRAM_AGENT = 'TelegramBot (like TwitterBot)'
 
@@ -21,6 +22,7 @@ def delete_from_course(request, course_id, student_id):
 
 def start_course(request, course_id):
     models.Course.objects.filter(pk=course_id).update(date_started=datetime.datetime.now())
+    bump_catalog_version('courses')
     messages.add_message(request, messages.INFO, 'Курс начат')
 
     return redirect(request.META['HTTP_REFERER'])
@@ -28,6 +30,7 @@ def start_course(request, course_id):
 
 def finish_course(request, course_id):
     models.Course.objects.filter(pk=course_id).update(date_finished=datetime.datetime.now())
+    bump_catalog_version('courses')
     messages.add_message(request, messages.INFO, 'Курс закончен')
 
     return redirect(request.META['HTTP_REFERER'])
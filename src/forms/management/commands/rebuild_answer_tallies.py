@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from forms.utils.tallies import rebuild_tallies
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать счетчики ответов на формы с нуля'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--form', type=int, help='Пересчитать только указанную форму')
+        parser.add_argument('--check', action='store_true', help='Только показать расхождения')
+
+    def handle(self, *args, form=None, check=False, **options):
+        expected, current = rebuild_tallies(form, dry_run=check)
+        mismatched = [
+            key for key in expected.keys() | current.keys()
+            if expected.get(key, 0) != current.get(key, 0)
+        ]
+        for form_id, question_id, answer_id in mismatched:
+            key = (form_id, question_id, answer_id)
+            self.stdout.write(
+                f'Форма {form_id}, вопрос {question_id}, ответ {answer_id}: '
+                f'{current.get(key, 0)} -> {expected.get(key, 0)}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Расхождений: {len(mismatched)}'))
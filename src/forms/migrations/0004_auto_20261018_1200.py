@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0003_alter_formquestion_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactformanswers',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['data'], name='forms_answers_data_gin'),
+        ),
+    ]
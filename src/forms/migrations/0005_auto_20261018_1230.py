@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FILL_TALLIES_SQL = """
+    INSERT INTO forms_formanswertally (form_id, question_id, answer_id, count, created_at)
+    SELECT fq.form_id, fq.id, fa.id, COUNT(*), NOW()
+    FROM forms_contactformanswers cfa
+    CROSS JOIN LATERAL jsonb_each(cfa.data) AS item
+    JOIN forms_formquestion fq ON fq.id::text = item.key AND fq.form_id = cfa.form_id
+    JOIN forms_formanswer fa ON fa.question_id = fq.id AND (
+        CASE WHEN jsonb_typeof(item.value) = 'array'
+        THEN item.value ELSE jsonb_build_array(item.value) END
+    ) ? fa.text
+    WHERE cfa.form_id IS NOT NULL
+    GROUP BY fq.form_id, fq.id, fa.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0004_auto_20261018_1200'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormAnswerTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True, verbose_name='Дата обновления')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество')),
+                ('answer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='forms.formanswer', verbose_name='Ответ')),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='forms.form', verbose_name='Форма')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='forms.formquestion', verbose_name='Вопрос')),
+            ],
+            options={
+                'verbose_name': 'Счетчик ответа',
+                'verbose_name_plural': 'Счетчики ответов',
+                'unique_together': {('form', 'question', 'answer')},
+            },
+        ),
+        migrations.RunSQL(FILL_TALLIES_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 13:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0005_auto_20261018_1230'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contactformanswers',
+            name='forms_answers_data_gin',
+        ),
+    ]
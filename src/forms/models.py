@@ -85,3 +85,15 @@ class ContactFormAnswers(BaseModel):
         verbose_name = 'Ответ на форму'
         verbose_name_plural = 'Ответы на форму'
         unique_together = [['contact', 'form']]
+
+
+class FormAnswerTally(BaseModel):
+    form = models.ForeignKey(Form, on_delete=models.CASCADE, verbose_name='Форма')
+    question = models.ForeignKey(FormQuestion, on_delete=models.CASCADE, verbose_name='Вопрос')
+    answer = models.ForeignKey(FormAnswer, on_delete=models.CASCADE, verbose_name='Ответ')
+    count = models.IntegerField(verbose_name='Количество', default=0)
+
+    class Meta:
+        verbose_name = 'Счетчик ответа'
+        verbose_name_plural = 'Счетчики ответов'
+        unique_together = [['form', 'question', 'answer']]
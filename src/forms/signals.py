@@ -1,9 +1,10 @@
 import os
-
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
-from forms.models import Form
+from forms.models import Form, FormQuestion, FormAnswer, ContactFormAnswers
+from forms.utils.tallies import recount_on_commit
+from general.utils.cache import invalidate_media, bump_catalog_version
 from general.utils.helpers import random_int
 
 
@@ -18,3 +19,66 @@ def form_modify_data(sender, instance, created, **kwargs):
         instance.unique_code = unique_code
         instance.link = link
         instance.save()
+
+
+@receiver(post_save, sender=Form)
+def form_invalidate_media(sender, instance, **kwargs):
+    """
+    Make bot upload media again if it was replaced
+    """
+    invalidate_media(instance.image)
+
+
+@receiver(post_save, sender=Form)
+@receiver(post_delete, sender=Form)
+@receiver(post_save, sender=FormQuestion)
+@receiver(post_delete, sender=FormQuestion)
+@receiver(post_save, sender=FormAnswer)
+@receiver(post_delete, sender=FormAnswer)
+def forms_catalog_changed(sender, **kwargs):
+    """
+    Make bot reload public forms and keyboards of questions
+    """
+    bump_catalog_version('forms')
+
+
+@receiver(pre_save, sender=ContactFormAnswers)
+def contact_answers_remember(sender, instance, **kwargs):
+    """
+    Remember form of saved answers, answers may be moved to another form
+    """
+    instance._saved_form_id = ContactFormAnswers.objects.filter(
+        pk=instance.pk).values_list('form_id', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=ContactFormAnswers)
+def contact_answers_saved(sender, instance, **kwargs):
+    """
+    Recount tallies of answers edited in admin. Bot updates tallies itself
+    """
+    for form_id in {getattr(instance, '_saved_form_id', None), instance.form_id} - {None}:
+        recount_on_commit(form_id)
+
+
+@receiver(post_delete, sender=ContactFormAnswers)
+def contact_answers_deleted(sender, instance, **kwargs):
+    """
+    Recount tallies of the form of deleted answers
+    """
+    if instance.form_id:
+        recount_on_commit(instance.form_id)
+
+
+@receiver(pre_save, sender=FormAnswer)
+def form_answer_remember(sender, instance, **kwargs):
+    instance._saved_text = FormAnswer.objects.filter(
+        pk=instance.pk).values_list('text', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=FormAnswer)
+def form_answer_renamed(sender, instance, **kwargs):
+    """
+    Answers are stored by text, so new or renamed answer option is recounted
+    """
+    if instance._saved_text != instance.text and instance.question_id:
+        recount_on_commit(instance.question.form_id)
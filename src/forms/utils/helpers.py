@@ -1,12 +1,14 @@
 import os
-from tempfile import NamedTemporaryFile
-from typing import Union
+from itertools import chain, islice
+from tempfile import TemporaryFile
+from typing import Iterable, List, Union
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse
 from openpyxl import Workbook
-from openpyxl.styles import Font
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
 from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.worksheet import Worksheet
 
 
 def normalize_answer(answer: Union[str, list]) -> str:
@@ -35,58 +37,66 @@ def _separated_line_width(cell) -> int:
     return width
 
 
-def adjust_width(ws: Worksheet, rows: list) -> None:
+def _cell_width(cell) -> int:
     """
-    Set width for cells in worksheet
+    Width of cell, line separated str is as wide as its longest word
     """
-    column_widths = []
-    for row in rows:
-        for i, cell in enumerate(row):
-            if len(column_widths) > i:
-                if len(str(cell)) > column_widths[i]:
-                    if os.linesep not in str(cell):
-                        column_widths[i] = len(str(cell))
-                    else:
-                        column_widths[i] = _separated_line_width(cell)
-            else:
-                column_widths += [len(str(cell))]
-    for i, column_width in enumerate(column_widths):
-        # Adding extra + 1 to width just in case
-        ws.column_dimensions[get_column_letter(i + 1)].width = column_width + 1
+    cell = str(cell)
+    return _separated_line_width(cell) if os.linesep in cell else len(cell)
 
 
-def _stylize_cells(ws: Worksheet) -> None:
+def column_widths(rows: Iterable[list]) -> List[int]:
     """
-    Styling cells in worksheet
+    Calculate max width of every column
     """
-    for idx, row in enumerate(ws.iter_rows()):
-        for cell in row:
-            if idx == 0:
-                cell.font = Font(sz=12, b=True)
-            cell.alignment = cell.alignment.copy(wrap_text=True)
+    widths = []
+    for row in rows:
+        for i, cell in enumerate(row):
+            width = _cell_width(cell)
+            if len(widths) > i:
+                widths[i] = max(widths[i], width)
+            else:
+                widths.append(width)
+    return widths
 
 
-def populate_ws(ws: Worksheet, rows: list) -> None:
+def generate_report(filename, headers: list, rows: Iterable[list]):
     """
-    Add data to worksheet
+    Stream rows to xlsx file in write-only mode and respond with it.
+    Write-only sheet needs widths of columns before the first row, so they
+    are estimated by the first REPORT_WIDTH_SAMPLE rows
     """
-    for row in rows:
-        ws.append(row)
-
-    _stylize_cells(ws)
-
+    workbook = Workbook(write_only=True)
+    ws = workbook.create_sheet()
 
-def generate_report(filename, rows):
-    workbook = Workbook()
-    ws = workbook.active
-
-    adjust_width(ws, rows)
-    populate_ws(ws, rows)
-
-    with NamedTemporaryFile() as tmp:
-        workbook.save(tmp.name)
-        stream = tmp.read()
-        return HttpResponse(stream, headers={
-            'Content-Type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'Content-Disposition': f'attachment; filename={filename}.xlsx',
-        })
+    rows = iter(rows)
+    sample = list(islice(rows, settings.REPORT_WIDTH_SAMPLE))
+    for i, width in enumerate(column_widths([headers, *sample])):
+        # Adding extra + 1 to width just in case
+        ws.column_dimensions[get_column_letter(i + 1)].width = width + 1
+
+    alignment = Alignment(wrap_text=True)
+    header_font = Font(sz=12, b=True)
+
+    def cells(row, font=None):
+        for value in row:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.alignment = alignment
+            if font:
+                cell.font = font
+            yield cell
+
+    ws.append(cells(headers, header_font))
+    for row in chain(sample, rows):
+        ws.append(cells(row))
+
+    # Closed by response when it is sent
+    tmp = TemporaryFile()
+    workbook.save(tmp)
+    tmp.seek(0)
+    return FileResponse(
+        tmp,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
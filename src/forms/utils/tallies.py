@@ -0,0 +1,78 @@
+from collections import Counter
+from typing import Optional, Tuple
+
+from django.db import connection, transaction
+
+from forms import models
+
+# Count of contacts chose an answer option. Answers are stored by text:
+# a string for a single answer and a list of strings for multi-answer question
+COUNT_ANSWERS_SQL = """
+    SELECT fq.form_id, fq.id, fa.id, COUNT(*)
+    FROM forms_contactformanswers cfa
+    CROSS JOIN LATERAL jsonb_each(cfa.data) AS item
+    JOIN forms_formquestion fq ON fq.id::text = item.key AND fq.form_id = cfa.form_id
+    JOIN forms_formanswer fa ON fa.question_id = fq.id AND (
+        CASE WHEN jsonb_typeof(item.value) = 'array'
+        THEN item.value ELSE jsonb_build_array(item.value) END
+    ) ? fa.text
+    WHERE cfa.form_id IS NOT NULL {}
+    GROUP BY fq.form_id, fq.id, fa.id
+"""
+
+
+def count_answers(form_id: Optional[int] = None) -> Counter:
+    """
+    Count answers of all contacts from scratch. Keys are (form_id, question_id, answer_id)
+    """
+    condition, params = ('AND cfa.form_id = %s', [form_id]) if form_id else ('', [])
+    with connection.cursor() as cursor:
+        cursor.execute(COUNT_ANSWERS_SQL.format(condition), params)
+        return Counter({(form, question, answer): count for form, question, answer, count in cursor.fetchall()})
+
+
+def recount_on_commit(form_id: int) -> None:
+    """
+    Recount tallies of the form when current transaction is committed.
+    A form changed several times in one transaction is recounted once
+    """
+    # Connections are per thread, so forms pending recount are kept on it
+    if not hasattr(connection, 'tally_forms'):
+        connection.tally_forms = set()
+    connection.tally_forms.add(form_id)
+    transaction.on_commit(_recount_pending)
+
+
+def _recount_pending() -> None:
+    form_ids, connection.tally_forms = connection.tally_forms, set()
+    # Forms deleted in the transaction have no tallies left
+    for form_id in models.Form.objects.filter(pk__in=form_ids).values_list('id', flat=True):
+        rebuild_tallies(form_id)
+
+
+def rebuild_tallies(form_id: Optional[int] = None, dry_run: bool = False) -> Tuple[Counter, dict]:
+    """
+    Recount tallies from scratch. Return expected and previous counts,
+    keys are (form_id, question_id, answer_id)
+    """
+    with transaction.atomic():
+        # Bot updates counters in the meantime, block it until recount is saved
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {models.FormAnswerTally._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+
+        tallies = models.FormAnswerTally.objects.all()
+        if form_id:
+            tallies = tallies.filter(form_id=form_id)
+        expected = count_answers(form_id)
+        current = {
+            (form, question, answer): count
+            for form, question, answer, count
+            in tallies.values_list('form_id', 'question_id', 'answer_id', 'count')
+        }
+        if not dry_run:
+            tallies.delete()
+            models.FormAnswerTally.objects.bulk_create(
+                models.FormAnswerTally(form_id=form, question_id=question, answer_id=answer, count=count)
+                for (form, question, answer), count in expected.items()
+            )
+    return expected, current
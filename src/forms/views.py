@@ -1,7 +1,7 @@
 from tempfile import NamedTemporaryFile
 
 import qrcode
-from django.db import connection
+from django.conf import settings
 from django.shortcuts import render
 from qrcode.image.svg import SvgImage
 
@@ -10,21 +10,16 @@ from forms.utils.helpers import normalize_answer, stringify_bool, generate_repor
 
 
 def get_answers_percentage(form_id, questions):
+    """
+    Percentage of every answer among answers of its question.
+    Counts are read from tallies maintained by bot
+    """
+    tally = dict(models.FormAnswerTally.objects.filter(form_id=form_id).values_list('answer_id', 'count'))
+
     resp = {}
     for question in questions:
-        total_count = 0
-        counts = []
-        for static_ans in question.answers.all():
-            # Retrieve count of times answer was selected and close session
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) FROM forms_contactformanswers WHERE
-                    form_id=%s AND (data->'%s')::jsonb ? %s
-                    """, [form_id, question.id, static_ans.text])
-                count, = cursor.fetchone()
-            total_count += count
-            counts.append((static_ans.id, count))
-            resp[static_ans.id] = count
+        counts = [(static_ans.id, tally.get(static_ans.id, 0)) for static_ans in question.answers.all()]
+        total_count = sum(count for _, count in counts)
         for answer_id, answer_count in counts:
             resp[answer_id] = round((answer_count/total_count)*100) if answer_count else 0
 
@@ -36,7 +31,7 @@ def form_statistics(request, form_id: int):
     Generate HTML page for displaying statistics
     """
     form = models.Form.objects.get(pk=form_id)
-    questions = form.formquestion_set.all()
+    questions = form.formquestion_set.prefetch_related('answers')
     percentage = get_answers_percentage(form_id, questions)
     qr = qrcode.make(
         form.link, error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -58,19 +53,17 @@ def form_report(request, form_id: int):
     Generate xlsx file for form
     """
     form = models.Form.objects.get(pk=form_id)
-    questions = form.formquestion_set.all()
-    answers = form.contactformanswers_set.all()
+    questions = list(form.formquestion_set.all())
+    answers = form.contactformanswers_set.select_related('contact').iterator(
+        chunk_size=settings.REPORT_CHUNK_SIZE)
 
     headers = ['Id', 'Студент', 'Дата прохождения', 'Зареган'] + [x.text for x in questions]
-    collected_answers = []
-    for answer in answers:
-        date_passed = (answer.updated_at if answer.updated_at else answer.created_at).strftime('%m/%d/%Y, %H:%M')
-        collected_answers.append(
-            [answer.id, answer.contact.__str__(), date_passed, stringify_bool(answer.contact.is_registered)]
-            + [normalize_answer(answer.data.get(str(x.id), '-')) for x in questions]
-        )
-
-    rows = [headers, *collected_answers]
-
-    return generate_report(form.id, rows)
+    rows = (
+        [answer.id, answer.contact.__str__(),
+         (answer.updated_at if answer.updated_at else answer.created_at).strftime('%m/%d/%Y, %H:%M'),
+         stringify_bool(answer.contact.is_registered)]
+        + [normalize_answer(answer.data.get(str(x.id), '-')) for x in questions]
+        for answer in answers
+    )
 
+    return generate_report(form.id, headers, rows)
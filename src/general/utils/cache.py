@@ -0,0 +1,49 @@
+import os
+
+import redis
+from django.conf import settings
+
+from general.utils.media_cache import MediaCache
+
+redis_client = redis.Redis(
+    host=os.getenv('REDIS_HOST'),
+    port=os.getenv('REDIS_PORT'),
+    db=settings.REDIS_CUSTOM_DATA
+)
+media_cache = MediaCache(redis_client)
+
+# Catalogs of admin-edited data cached by the bot. The bot reloads a catalog
+# as soon as its version is changed
+CATALOG_VERSION_KEY = 'catalog:version:{}'
+CATALOGS = ('courses', 'companies', 'forms')
+
+
+def invalidate_media(*files) -> None:
+    """
+    Forget cached digests of model file fields
+    """
+    media_cache.invalidate(*[file.path for file in files if file])
+
+
+def bump_catalog_version(name: str) -> None:
+    """
+    Invalidate catalog cached by the bot
+    """
+    assert name in CATALOGS, f'Unknown catalog {name}'
+    redis_client.incr(CATALOG_VERSION_KEY.format(name))
+
+
+# Locale of a contact cached by the bot, see bot.utils.cache.LocaleCache.
+# Bumping the version makes bot processes drop locales kept in memory
+LOCALE_KEY = 'locale:{}'
+LOCALE_VERSION_KEY = 'locale:version'
+
+
+def invalidate_locale(tg_id: int) -> None:
+    """
+    Make bot read locale of contact from database
+    """
+    pipe = redis_client.pipeline()
+    pipe.delete(LOCALE_KEY.format(tg_id))
+    pipe.incr(LOCALE_VERSION_KEY)
+    pipe.execute()
@@ -1,3 +1,4 @@
+import asyncio
 import random
 import uuid
 
@@ -8,3 +9,10 @@ def random_int():
 
 def generate_uuid():
     return str(uuid.uuid4())[:8]
+
+
+async def run_sync(func, *args):
+    """
+    Run blocking function, e.g. a call of redis-py, in executor of the running loop
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
@@ -0,0 +1,181 @@
+"""
+Cache of telegram file_id of uploaded media shared by the bot and broadcasts.
+
+Media is addressed by its content: equal files at different paths are uploaded once,
+and a file replaced at the same path is uploaded again. Hashing the content on every
+send would be too slow, so digest of a path is remembered together with size and mtime
+of the file and only recalculated when they change.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from typing import Optional
+
+from general.utils.helpers import run_sync
+
+# Seconds other senders wait for file_id while the media is being uploaded
+UPLOAD_TIMEOUT = 120
+UPLOAD_POLL_INTERVAL = .5
+
+PREFIX = 'media'
+STATS_KEY = f'{PREFIX}:stats'
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _path_key(path: str) -> str:
+    return f'{PREFIX}:path:{hashlib.md5(str(path).encode()).hexdigest()}'
+
+
+def _file_key(kind: str, digest: str, size: int) -> str:
+    # file_id of a photo cannot be sent as a document, thus kind is a part of the key
+    return f'{PREFIX}:file:{kind}:{digest}:{size}'
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class MediaCache:
+    """
+    Cache working through redis-py client
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def key(self, kind: str, path: str) -> str:
+        """
+        Content key of media at path
+        """
+        stat = os.stat(path)
+        signature = f'{stat.st_size}:{stat.st_mtime_ns}'
+        cached_signature, digest = map(_decode, self.redis.hmget(_path_key(path), 'signature', 'digest'))
+        if cached_signature != signature or not digest:
+            digest = file_digest(path)
+            self.redis.hset(_path_key(path), mapping={'signature': signature, 'digest': digest})
+        return _file_key(kind, digest, stat.st_size)
+
+    def get(self, key: str) -> Optional[str]:
+        file_id = _decode(self.redis.get(key))
+        pipe = self.redis.pipeline()
+        if file_id:
+            pipe.hincrby(STATS_KEY, 'hits')
+            pipe.hincrby(STATS_KEY, 'saved_bytes', int(key.split(':')[-1]))
+        else:
+            pipe.hincrby(STATS_KEY, 'misses')
+        pipe.execute()
+        return file_id
+
+    def set(self, key: str, file_id: str) -> None:
+        pipe = self.redis.pipeline()
+        pipe.set(key, file_id)
+        pipe.hincrby(STATS_KEY, 'uploads')
+        pipe.hincrby(STATS_KEY, 'upload_bytes', int(key.split(':')[-1]))
+        pipe.execute()
+
+    def lock(self, key: str) -> bool:
+        """
+        Become the only sender uploading media. Others wait for its file_id
+        """
+        return bool(self.redis.set(f'{key}:lock', 1, nx=True, ex=UPLOAD_TIMEOUT))
+
+    def unlock(self, key: str) -> None:
+        self.redis.delete(f'{key}:lock')
+
+    def _poll(self, key: str):
+        file_id, lock = self.redis.mget(key, f'{key}:lock')
+        return _decode(file_id), bool(lock)
+
+    def wait(self, key: str) -> Optional[str]:
+        """
+        Block until media is uploaded by another sender. Return its file_id
+        """
+        deadline = time.monotonic() + UPLOAD_TIMEOUT
+        file_id, is_uploading = self._poll(key)
+        while not file_id and is_uploading and time.monotonic() < deadline:
+            time.sleep(UPLOAD_POLL_INTERVAL)
+            file_id, is_uploading = self._poll(key)
+        return file_id
+
+    async def await_upload(self, key: str) -> Optional[str]:
+        """
+        Same as wait, but does not block event loop
+        """
+        deadline = time.monotonic() + UPLOAD_TIMEOUT
+        file_id, is_uploading = await run_sync(self._poll, key)
+        while not file_id and is_uploading and time.monotonic() < deadline:
+            await asyncio.sleep(UPLOAD_POLL_INTERVAL)
+            file_id, is_uploading = await run_sync(self._poll, key)
+        return file_id
+
+    def invalidate(self, *paths: str) -> None:
+        """
+        Forget digests of files, e.g. when they were replaced by admin
+        """
+        if paths:
+            self.redis.delete(*[_path_key(path) for path in paths])
+
+    def stats(self) -> dict:
+        return {_decode(k): int(v) for k, v in self.redis.hgetall(STATS_KEY).items()}
+
+
+class AsyncMediaCache:
+    """
+    Cache working through aioredis client
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def key(self, kind: str, path: str) -> str:
+        stat = os.stat(path)
+        signature = f'{stat.st_size}:{stat.st_mtime_ns}'
+        cached_signature, digest = await self.redis.hmget(
+            _path_key(path), 'signature', 'digest', encoding='utf8'
+        )
+        if cached_signature != signature or not digest:
+            digest = await asyncio.get_event_loop().run_in_executor(None, file_digest, path)
+            await self.redis.hmset_dict(_path_key(path), {'signature': signature, 'digest': digest})
+        return _file_key(kind, digest, stat.st_size)
+
+    async def get(self, key: str) -> Optional[str]:
+        file_id = await self.redis.get(key, encoding='utf8')
+        tr = self.redis.multi_exec()
+        if file_id:
+            tr.hincrby(STATS_KEY, 'hits')
+            tr.hincrby(STATS_KEY, 'saved_bytes', int(key.split(':')[-1]))
+        else:
+            tr.hincrby(STATS_KEY, 'misses')
+        await tr.execute()
+        return file_id
+
+    async def set(self, key: str, file_id: str) -> None:
+        tr = self.redis.multi_exec()
+        tr.set(key, file_id)
+        tr.hincrby(STATS_KEY, 'uploads')
+        tr.hincrby(STATS_KEY, 'upload_bytes', int(key.split(':')[-1]))
+        await tr.execute()
+
+    async def lock(self, key: str) -> bool:
+        return bool(await self.redis.set(
+            f'{key}:lock', 1, expire=UPLOAD_TIMEOUT, exist=self.redis.SET_IF_NOT_EXIST
+        ))
+
+    async def unlock(self, key: str) -> None:
+        await self.redis.delete(f'{key}:lock')
+
+    async def wait(self, key: str) -> Optional[str]:
+        deadline = time.monotonic() + UPLOAD_TIMEOUT
+        while time.monotonic() < deadline:
+            file_id, lock = await self.redis.mget(key, f'{key}:lock', encoding='utf8')
+            if file_id or not lock:
+                return file_id
+            await asyncio.sleep(UPLOAD_POLL_INTERVAL)
@@ -2,15 +2,28 @@ from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.gis.db.models import PointField
+from django.db.models import Prefetch
 from django.http import HttpResponseRedirect
 from django.shortcuts import render
-from django.template.loader import render_to_string
+from django.utils.html import format_html_join
 from mapwidgets import GooglePointFieldWidget
 
 from broadcast.forms import BroadcastForm
+from courses.models import Course
 from users import models, forms
 
 
+def courses_prefetch():
+    return Prefetch('courses', queryset=Course.objects.only('id', 'name'))
+
+
+def display_courses(student):
+    """
+    List of names of prefetched courses
+    """
+    return format_html_join('', '<li>{}</li>', ((course.name,) for course in student.courses.all())) or 'Нет курсов'
+
+
 @admin.register(models.Lead)
 class LeadAdmin(admin.ModelAdmin):
     list_display = ('id', '__str__', 'tg_id', 'application_type',
@@ -21,6 +34,7 @@ class LeadAdmin(admin.ModelAdmin):
     list_display_links = ('__str__',)
     readonly_fields = ('checkout_date', 'tg_id', 'invite_link', 'created_at', 'blocked_bot')
     exclude = ('unique_code', 'contact')
+    list_select_related = ('contact',)
     actions = ('send_message', 'send_checkout', 'assign_courses', 'assign_free_courses')
     search_fields = ('id', 'first_name', 'last_name')
     ordering = ('id',)
@@ -85,14 +99,13 @@ class LeadAdmin(admin.ModelAdmin):
         return render(request, 'dashboard/assign_courses.html',
                       context={'entities': leads, 'courses': courses, 'action': 'assign_free_courses'})
 
+    def get_queryset(self, request):
+        qs = super(LeadAdmin, self).get_queryset(request)
+        return qs.prefetch_related(courses_prefetch())
+
     @admin.display(description='Курсы')
     def get_courses(self, lead):
-        return render_to_string(
-            'users/display_courses.html',
-            {
-                'courses': lead.courses.values_list('name', flat=True)
-            }
-        )
+        return display_courses(lead)
 
     formfield_overrides = {
             PointField: {"widget": GooglePointFieldWidget(settings=settings.MAP_WIDGETS)}
@@ -108,6 +121,7 @@ class ClientAdmin(admin.ModelAdmin):
     actions = ('send_message', 'send_checkout', 'assign_courses', 'assign_free_courses')
     readonly_fields = ('unique_code', 'tg_id', 'checkout_date', 'invite_link', 'created_at', 'blocked_bot')
     exclude = ('contact',)
+    list_select_related = ('contact',)
     search_fields = ('id', 'first_name', 'last_name')
     ordering = ('id',)
     date_hierarchy = 'created_at'
@@ -147,14 +161,13 @@ class ClientAdmin(admin.ModelAdmin):
         }
         return render(request, "broadcast/send.html", context=context)
 
+    def get_queryset(self, request):
+        qs = super(ClientAdmin, self).get_queryset(request)
+        return qs.prefetch_related(courses_prefetch())
+
     @admin.display(description='Курсы')
     def get_courses(self, client):
-        return render_to_string(
-            'users/display_courses.html',
-            {
-                'courses': client.courses.values_list('name', flat=True)
-            }
-        )
+        return display_courses(client)
 
     @admin.display(description='Назначить курсы')
     def assign_courses(self, request, clients):
@@ -1,3 +1,69 @@
+from itertools import count
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from companies.models import Company
+from contacts.models import Contact
+from courses.models import Course, CourseCategory, StudentCourse
+from users import models
+
+sequence = count(1)
+
+
+class ChangelistQueriesTest(TestCase):
+    """
+    Amount of queries of changelists does not depend on amount of rows.
+    Fixtures are bulk created to skip signals notifying bot
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = models.User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        company, = Company.objects.bulk_create([Company(title='Центр', description='-', slug='center')])
+        category, = CourseCategory.objects.bulk_create([CourseCategory(name='Группа')])
+        cls.courses = Course.objects.bulk_create([
+            Course(name=f'Курс {i}', description='-', company=company, category=category, chat_id=i)
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_students(self, amount: int, is_client: bool) -> None:
+        contacts = Contact.objects.bulk_create([
+            Contact(first_name='Контакт', tg_id=next(sequence)) for _ in range(amount)
+        ])
+        students = models.Student.objects.bulk_create([
+            models.Student(first_name='Студент', city='-', phone=str(contact.tg_id),
+                           is_client=is_client, contact=contact)
+            for contact in contacts
+        ])
+        StudentCourse.objects.bulk_create([
+            StudentCourse(student=student, course=course)
+            for student in students for course in self.courses
+        ])
+
+    def changelist_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assertConstantQueries(self, url: str, is_client: bool = False):
+        self.create_students(2, is_client)
+        few = self.changelist_queries(url)
+        self.create_students(10, is_client)
+        many = self.changelist_queries(url)
+        self.assertEqual(few, many)
+
+    def test_lead_changelist(self):
+        self.assertConstantQueries(reverse('admin:users_lead_changelist'))
+
+    def test_client_changelist(self):
+        self.assertConstantQueries(reverse('admin:users_client_changelist'), is_client=True)
 
-# Create your tests here.
+    def test_contact_changelist(self):
+        self.assertConstantQueries(reverse('admin:contacts_contact_changelist'))